@@ -1,20 +1,20 @@
-
 -- KPI Validation Query (The Golden Record)
 -- Run this in DuckDB to check numbers against Power BI
+-- Reads the (month, shop) rollup maintained by dbt (agg_kpi_monthly), so it
+-- scans a few rows per month instead of every line item in fct_transactions
 
 select
-    extract(year from date_key) as year,
-    extract(month from date_key) as month,
+    year,
+    month,
     shop_key,
     
-    count(distinct order_id) as total_orders,
-    sum(gross_revenue_eur) as gross_revenue,
-    sum(marketing_cost_allocated_eur) as marketing_spend,
-    sum(contribution_margin_eur) as contribution_margin,
+    total_orders,
+    gross_revenue,
+    marketing_spend,
+    contribution_margin,
     
     -- Check Returns
-    sum(case when is_returned then gross_revenue_eur else 0 end) as returned_revenue
+    returned_revenue
 
-from fct_transactions
-group by 1, 2, 3
+from agg_kpi_monthly
 order by 1, 2, 3
@@ -0,0 +1,103 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import instrumentation
+from bench_pipeline import reset_peak_rss, peak_rss_mb
+from main import main as generate, budget_from_revenue
+from writers import CHUNK_ROWS
+
+
+def join_and_iterrows(orders, lines):
+    """The former budget step: join all line items to their orders, group, then add noise row by row."""
+    full_df = lines.merge(orders, on='order_id')
+    full_df['revenue'] = full_df['unit_price_paid'] * full_df['qty']
+    full_df['month'] = pd.to_datetime(full_df['order_date']).dt.to_period('M')
+    budget_agg = full_df.groupby(['shop_id', 'month', 'currency_code'])['revenue'].sum().reset_index()
+
+    budget_rows = []
+    for _, row in budget_agg.iterrows():
+        noise = np.random.uniform(0.95, 1.05)
+        budget_rows.append({
+            'month': row['month'].start_time.date(),
+            'shop_id': row['shop_id'],
+            'currency': row['currency_code'],
+            'budget_revenue': round(row['revenue'] * noise, 2)
+        })
+    return pd.DataFrame(budget_rows)
+
+
+def running_total_cost(lines, chunk_rows):
+    """
+    What the streaming budget step adds during generation: one dot product
+    per generated chunk (run_shard keeps a running total per shop/month).
+    """
+    revenue = 0.0
+    for start in range(0, len(lines), chunk_rows):
+        chunk = lines.iloc[start:start + chunk_rows]
+        revenue += float(chunk['unit_price_paid'].to_numpy() @ chunk['qty'].to_numpy())
+    return revenue
+
+
+def measure(func, *args):
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start, peak_rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budget step: join + iterrows vs streaming running totals.")
+    parser.add_argument('--scale', type=float, default=100.0, help="Volume scale factor (default: 100)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='vantage_bench_budget_')
+    output_dir = os.path.join(work_dir, 'output')
+    try:
+        print(f"Generating {args.scale:g}x volume (Parquet)...")
+        instrumentation.enable()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(fmt='parquet', scale=args.scale, output_dir=output_dir,
+                     db_path=os.path.join(work_dir, 'vantage.duckdb'))
+        events = {e['name']: e for e in instrumentation.drain() if e['cat'] == 'stage'}
+        instrumentation.disable()
+        budget_s = events['budget']['dur_us'] / 1e6
+        generation_peak = max(e['peak_rss_mb'] for e in events.values())
+
+        orders = pd.read_parquet(os.path.join(output_dir, 'raw_orders'))
+        lines = pd.read_parquet(os.path.join(output_dir, 'raw_line_items'))
+        base_mb = peak_rss_mb()
+        print(f"Orders: {len(orders)}, line items: {len(lines)}; both tables in memory: {base_mb:.0f} MB")
+
+        _, old_s, old_peak = measure(join_and_iterrows, orders, lines)
+        _, totals_s, _ = measure(running_total_cost, lines, CHUNK_ROWS)
+        # The shard summaries main.py aggregates: gross revenue per shop/month
+        lines_month = lines.merge(orders, on='order_id')
+        lines_month['revenue'] = lines_month['unit_price_paid'] * lines_month['qty']
+        lines_month['month'] = pd.to_datetime(lines_month['order_date']).dt.to_period('M')
+        revenue = lines_month.groupby(['shop_id', 'month', 'currency_code'])['revenue'].sum().reset_index()
+        del lines_month
+        _, noise_s, _ = measure(budget_from_revenue, revenue)
+
+        print(f"\n{'budget step':<42} {'time_s':>8} {'peak_rss_mb':>12}")
+        print(f"{'join + groupby + iterrows (before)':<42} {old_s:>8.2f} {old_peak:>12.0f}")
+        print(f"{'running totals, all chunks':<42} {totals_s:>8.2f} {'-':>12}")
+        print(f"{'budget from totals (array noise)':<42} {noise_s:>8.4f} {'-':>12}")
+        print(f"{'budget stage inside main.py (after)':<42} {budget_s:>8.4f} {generation_peak:>12.0f}")
+        print(f"\nJoin-based step peaks {old_peak - base_mb:.0f} MB above the raw tables; "
+              f"main.py never holds the raw tables (whole run peak {generation_peak:.0f} MB).")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
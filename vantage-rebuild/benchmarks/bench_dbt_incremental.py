@@ -0,0 +1,101 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import duckdb
+from main import main as generate
+
+DBT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../dbt_project'))
+
+
+def dbt_run(db_path, work_dir, *args, command='run'):
+    """Runs dbt against a scratch database (artifacts and logs stay in work_dir)."""
+    env = dict(os.environ, VANTAGE_DB_PATH=db_path)
+    cmd = [
+        'dbt', command, '--profiles-dir', '.', '--select', '+fct_transactions',
+        '--target-path', os.path.join(work_dir, 'target'),
+        '--log-path', os.path.join(work_dir, 'logs'),
+        *args
+    ]
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=DBT_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    wall_s = time.perf_counter() - start
+
+    # Model execution time without dbt start-up, from the run artifacts
+    with open(os.path.join(work_dir, 'target', 'run_results.json')) as f:
+        results = json.load(f)['results']
+    model_s = sum(r['execution_time'] for r in results if r['unique_id'].endswith('.fct_transactions'))
+    return wall_s, model_s
+
+
+def hold_out_last_day(con):
+    """Moves the latest day of orders, line items and marketing into holding tables."""
+    last_day = con.execute("SELECT max(order_date) FROM raw_orders").fetchone()[0]
+    con.execute(f"CREATE TABLE hold_orders AS SELECT * FROM raw_orders WHERE order_date = DATE '{last_day}'")
+    con.execute("CREATE TABLE hold_lines AS SELECT * FROM raw_line_items WHERE order_id IN (SELECT order_id FROM hold_orders)")
+    con.execute(f"CREATE TABLE hold_marketing AS SELECT * FROM raw_marketing_daily WHERE date = DATE '{last_day}'")
+    con.execute("DELETE FROM raw_line_items WHERE order_id IN (SELECT order_id FROM hold_orders)")
+    con.execute(f"DELETE FROM raw_orders WHERE order_date = DATE '{last_day}'")
+    con.execute(f"DELETE FROM raw_marketing_daily WHERE date = DATE '{last_day}'")
+    return last_day
+
+
+def land_last_day(con):
+    con.execute("INSERT INTO raw_orders SELECT * FROM hold_orders")
+    con.execute("INSERT INTO raw_line_items SELECT * FROM hold_lines")
+    con.execute("INSERT INTO raw_marketing_daily SELECT * FROM hold_marketing")
+    for table in ['hold_orders', 'hold_lines', 'hold_marketing']:
+        con.execute(f"DROP TABLE {table}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time adding one day to fct_transactions: incremental vs full.")
+    parser.add_argument('--scale', type=float, default=10.0, help="Volume scale factor (default: 10)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='vantage_bench_dbt_')
+    db_path = os.path.join(work_dir, 'vantage.duckdb')
+    try:
+        print(f"Generating {args.scale:g}x volume...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(fmt='direct', scale=args.scale, output_dir=os.path.join(work_dir, 'output'), db_path=db_path)
+
+        con = duckdb.connect(db_path)
+        last_day = hold_out_last_day(con)
+        con.close()
+
+        # Exchange rates seed, then the history without the last day built from scratch
+        dbt_run(db_path, work_dir, command='seed')
+        history_s = dbt_run(db_path, work_dir, '--full-refresh')
+
+        con = duckdb.connect(db_path)
+        land_last_day(con)
+        lines = con.execute("SELECT count(*) FROM raw_line_items").fetchone()[0]
+        con.close()
+
+        incremental_s = dbt_run(db_path, work_dir)
+        full_s = dbt_run(db_path, work_dir, '--full-refresh')
+
+        print(f"Line items: {lines}, new day: {last_day}")
+        print(f"{'build':<30} {'dbt_wall_s':>10} {'fct_model_s':>12}")
+        for label, (wall_s, model_s) in [
+            ('Full build of history', history_s),
+            ('Add one day (incremental)', incremental_s),
+            ('Add one day (--full-refresh)', full_s)
+        ]:
+            print(f"{label:<30} {wall_s:>10.2f} {model_s:>12.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SHARED_DIR = os.path.join(BASE_DIR, 'data_generation', 'src')
+
+# Heavy third-party packages, imported only by the subcommands that need them
+HEAVY = ['faker', 'matplotlib', 'seaborn', 'duckdb', 'pandas', 'numpy', 'pyarrow']
+
+# Import-time budget per entry point: (directory, module, budget in ms)
+# (which heavy packages each one may load is checked in tests/test_imports.py)
+BUDGETS = {
+    'cli': ('.', 'vantage', 50),
+    'generate': ('data_generation/src', 'main', 1000),
+    'load': ('data_generation/src', 'load_duckdb', 100),
+    'scenarios': ('data_generation/src', 'scenarios', 1000),
+    'export': ('src', 'export_bi_tables', 1000),
+    'plot': ('viz', 'generate_plots', 1000),
+}
+
+
+def import_profile(directory, module):
+    """
+    Runs `python -X importtime -c "import <module>"` in a fresh interpreter.
+    Returns (total ms, imported top-level package names).
+    """
+    # Same path as vantage.py gives the subcommands: the shared modules come first
+    env = dict(os.environ, PYTHONPATH=SHARED_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.join(BASE_DIR, directory), env=env, capture_output=True, text=True, check=True
+    )
+    total_us, packages = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        top_level = not line.split('|')[2].startswith('  ')
+        if top_level and name == 'site':
+            # Interpreter startup (site and its .pth hooks) is not part of the import
+            total_us, packages = 0, set()
+            continue
+        packages.add(name.split('.')[0])
+        # Unindented entries are imported by the statement itself; their cumulative times add up
+        if top_level:
+            total_us += int(cumulative)
+    return total_us / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check for the pipeline entry points.")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per entry point, best one counts")
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help="Multiplier on every budget (slow CI machines)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'entry point':<12} {'import_ms':>10} {'budget_ms':>10}  heavy packages")
+    for name, (directory, module, budget_ms) in BUDGETS.items():
+        runs = [import_profile(directory, module) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        packages = runs[0][1]
+        budget_ms *= args.budget_scale
+
+        over = best_ms > budget_ms
+        failed = failed or over
+
+        heavy = ', '.join(p for p in HEAVY if p in packages) or '-'
+        flag = '  FAIL: over budget' if over else ''
+        print(f"{name:<12} {best_ms:>10.0f} {budget_ms:>10.0f}  {heavy}{flag}")
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
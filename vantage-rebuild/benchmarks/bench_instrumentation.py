@@ -0,0 +1,79 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+import timeit
+import instrumentation
+from main import main as generate
+
+
+@instrumentation.profiled
+def _hot():
+    return None
+
+
+def disabled_hook_cost(number=200_000):
+    """Seconds per disabled hook: one stage() with add() plus one @profiled call."""
+    instrumentation.disable()
+
+    def hook():
+        with instrumentation.stage('chunk', cat='chunk', table='t') as st:
+            st.add(rows=1, bytes=1)
+        _hot()
+
+    return min(timeit.repeat(hook, number=number, repeat=5)) / number
+
+
+def time_generation(scale, repeat, trace):
+    """Best-of wall time of main.py (CSV) with tracing on or off; returns (seconds, events)."""
+    best, events = None, 0
+    for _ in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix='vantage_bench_trace_')
+        try:
+            if trace:
+                instrumentation.enable()
+            else:
+                instrumentation.disable()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                generate(scale=scale, output_dir=os.path.join(work_dir, 'output'),
+                         db_path=os.path.join(work_dir, 'vantage.duckdb'))
+                elapsed = time.perf_counter() - start
+            events = len(instrumentation.drain())
+            best = elapsed if best is None else min(best, elapsed)
+        finally:
+            instrumentation.disable()
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return best, events
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report what tracing costs, on and off (the overhead bound is checked in tests/test_instrumentation.py)."
+    )
+    parser.add_argument('--scale', type=float, default=1.0, help="Volume scale factor (default: 1)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per mode, best one counts")
+    args = parser.parse_args()
+
+    per_hook_s = disabled_hook_cost()
+    off_s, _ = time_generation(args.scale, args.repeat, trace=False)
+    on_s, events = time_generation(args.scale, args.repeat, trace=True)
+
+    # Every recorded event stands for one disabled hook (+ one @profiled call) when tracing is off
+    disabled_s = events * per_hook_s
+    print(f"Disabled hook cost:   {per_hook_s * 1e9:.0f} ns")
+    print(f"Hooks per run:        {events}")
+    print(f"Run without tracing:  {off_s:.3f} s")
+    print(f"Run with tracing:     {on_s:.3f} s ({(on_s / off_s - 1) * 100:+.1f}%)")
+    print(f"Disabled overhead:    {disabled_s * 1e6:.0f} us = {disabled_s / off_s * 100:.4f}% of the run")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+from datetime import date
+import numpy as np
+from seasonality import SeasonalityEngine
+from generators import ProductGenerator, CustomerGenerator, OrderFactory
+from sharding import plan_shards
+from main import SHOPS
+
+
+def dict_rows_bytes(rows):
+    """
+    Deep size of a list of row dicts: the list slot, every dict and every
+    value object, with shared objects (interned strings, one date per day,
+    small ints, booleans) counted once.
+    """
+    seen = set()
+    total = 8 * len(rows)
+    for row in rows:
+        for obj in (row, *row.values()):
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+    return total
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def columnar_bytes_per_row(factory, shards):
+    """Bytes per row of the chunk DataFrames the order engine hands to the writers."""
+    totals = {'orders': [0, 0], 'line_items': [0, 0]}
+    for shard in shards:
+        shop = shard['shop']
+        for orders, lines in factory.iter_order_chunks(
+            shard['dates'], shop['base'] * shard['multipliers'], shop['id'], shop['currency'],
+            shard['chunk_rows'], rng=np.random.default_rng(shard['seed_seq'])
+        ):
+            for name, df in (('orders', orders), ('line_items', lines)):
+                totals[name][0] += frame_bytes(df)
+                totals[name][1] += len(df)
+    return {name: (size / rows, rows) for name, (size, rows) in totals.items()}
+
+
+def dict_bytes_per_row(factory, calendar_df, days):
+    """Bytes per row of the row-wise path (lists of dicts), on the first days of the DE shop."""
+    np.random.seed(42)
+    orders, lines = [], []
+    for _, day in calendar_df.head(days).iterrows():
+        day_orders, day_lines = factory.generate_orders_for_day(
+            day['date'].date(), SHOPS[0]['base'] * day['total_multiplier'], SHOPS[0]['id'], SHOPS[0]['currency']
+        )
+        orders.extend(day_orders)
+        lines.extend(day_lines)
+    return {'orders': dict_rows_bytes(orders) / len(orders), 'line_items': dict_rows_bytes(lines) / len(lines)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per row of the in-process order and line item tables.")
+    parser.add_argument('--scale', type=float, default=100.0, help="Volume scale factor (default: 100)")
+    parser.add_argument('--dict-days', type=int, default=7, help="Days generated row-wise for the dict baseline")
+    args = parser.parse_args()
+
+    np.random.seed(42)
+    products = ProductGenerator().generate()
+    customers = CustomerGenerator().generate()
+    calendar_df = SeasonalityEngine(start_date=date(2024, 1, 1), days=365).get_daily_multipliers()
+    factory = OrderFactory(products, customers)
+
+    shops = [dict(shop, base=shop['base'] * args.scale) for shop in SHOPS]
+    columnar = columnar_bytes_per_row(factory, plan_shards(calendar_df, shops, 42))
+    dicts = dict_bytes_per_row(factory, calendar_df, args.dict_days)
+
+    print(f"{'table':<12} {'rows':>10} {'dict rows B/row':>16} {'columnar B/row':>15} {'full table columnar':>20}")
+    for name in ('orders', 'line_items'):
+        per_row, rows = columnar[name]
+        print(f"{name:<12} {rows:>10} {dicts[name]:>16.1f} {per_row:>15.1f} {rows * per_row / 2**20:>17.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from main import main as generate
+from load_duckdb import load_data
+from schemas import OUTPUT_FORMATS
+from writers import DIRECT_FORMAT
+
+
+def dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1024 / 1024
+
+
+def run_case(fmt, scale, workers):
+    """Generates and loads one dataset in a scratch directory; returns timings and raw file size."""
+    work_dir = tempfile.mkdtemp(prefix=f'vantage_bench_{fmt}_')
+    output_dir = os.path.join(work_dir, 'output')
+    db_path = os.path.join(work_dir, 'vantage.duckdb')
+    try:
+        # Silence the pipeline's progress prints
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            generate(workers=workers, fmt=fmt, scale=scale, output_dir=output_dir, db_path=db_path)
+            generated = time.perf_counter()
+            # Direct mode has already materialized the raw tables
+            if fmt != DIRECT_FORMAT:
+                load_data(db_path=db_path, data_dir=output_dir, fmt=fmt)
+            loaded = time.perf_counter()
+        return {
+            'format': fmt,
+            'scale': scale,
+            'generate_s': generated - start,
+            'load_s': loaded - generated,
+            'total_s': loaded - start,
+            'disk_mb': dir_size_mb(output_dir)
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV vs Parquet vs direct for generate + load.")
+    parser.add_argument('--scales', default='1,10,100', help="Comma-separated volume scale factors")
+    parser.add_argument('--formats', default=','.join(OUTPUT_FORMATS + [DIRECT_FORMAT]), help="Comma-separated formats")
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'format':<8} {'scale':>6} {'generate_s':>11} {'load_s':>8} {'total_s':>8} {'disk_mb':>9}")
+    for scale in [float(s) for s in args.scales.split(',')]:
+        for fmt in args.formats.split(','):
+            r = run_case(fmt, scale, args.workers)
+            print(f"{r['format']:<8} {r['scale']:>6g} {r['generate_s']:>11.2f} {r['load_s']:>8.2f} "
+                  f"{r['total_s']:>8.2f} {r['disk_mb']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
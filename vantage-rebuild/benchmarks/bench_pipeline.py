@@ -0,0 +1,278 @@
+import sys
+import os
+
+# Add data_generation/src and src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime
+import duckdb
+import numpy as np
+from generators import ProductGenerator, CustomerGenerator, OrderFactory
+import seasonality as seasonality_module
+from seasonality import SeasonalityEngine
+from sharding import plan_shards
+from main import main as generate, SHOPS
+from load_duckdb import load_data
+from export_bi_tables import export_tables, MANIFEST_FILE
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DBT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '../dbt_project'))
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline_pipeline.json')
+
+# Reference volumes of main.py (SHOPS, products, customers); everything is multiplied by the scale factor
+NUM_PRODUCTS = 500
+NUM_CUSTOMERS = 5000
+SEED = 42
+
+
+def reset_peak_rss():
+    """Resets the kernel's high-water mark so the next reading covers one stage (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            return int(re.search(r'VmHWM:\s+(\d+)', f.read()).group(1)) / 1024
+    except (OSError, AttributeError):
+        # No per-stage reset possible: peak of the whole process so far
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_stage(stage, func):
+    """
+    Times one stage. `func` returns the rows it produced, or (rows, peak_mb)
+    when the work happens in a child process.
+    """
+    reset_peak_rss()
+    # Every stage starts from the same seed, so its data (and timing) does not depend on the stages before it
+    np.random.seed(SEED)
+    start = time.perf_counter()
+    # Silence the pipeline's progress prints
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    wall_s = time.perf_counter() - start
+    rows, peak_mb = result if isinstance(result, tuple) else (result, peak_rss_mb())
+    return {
+        'stage': stage,
+        'wall_s': round(wall_s, 4),
+        'peak_rss_mb': round(peak_mb, 1),
+        'rows': int(rows),
+        'rows_per_s': round(rows / wall_s, 1) if wall_s > 0 else None
+    }
+
+
+def run_dbt(db_path, work_dir):
+    """dbt build against the scratch database; returns (fct_transactions rows, dbt peak RSS)."""
+    env = dict(os.environ, VANTAGE_DB_PATH=db_path)
+    cmd = [
+        'dbt', 'build', '--profiles-dir', '.',
+        '--target-path', os.path.join(work_dir, 'target'),
+        '--log-path', os.path.join(work_dir, 'logs')
+    ]
+    proc = subprocess.Popen(cmd, cwd=DBT_DIR, env=env, stdout=subprocess.DEVNULL)
+    # wait4 gives the resource usage of exactly this child
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+    con = duckdb.connect(db_path, read_only=True)
+    rows = con.execute("SELECT count(*) FROM fct_transactions").fetchone()[0]
+    con.close()
+    return rows, usage.ru_maxrss / 1024
+
+
+def run_scale(scale, workers):
+    """Runs every stage once at one scale factor in a scratch directory."""
+    work_dir = tempfile.mkdtemp(prefix='vantage_bench_pipeline_')
+    output_dir = os.path.join(work_dir, 'output')
+    db_path = os.path.join(work_dir, 'vantage.duckdb')
+    export_dir = os.path.join(work_dir, 'export')
+    num_products = int(NUM_PRODUCTS * scale)
+    num_customers = int(NUM_CUSTOMERS * scale)
+    shops = [dict(shop, base=shop['base'] * scale) for shop in SHOPS]
+    state = {}
+
+    def products():
+        state['products'] = ProductGenerator(num_products=num_products).generate()
+        return len(state['products'])
+
+    def customers():
+        state['customers'] = CustomerGenerator(num_customers=num_customers).generate()
+        return len(state['customers'])
+
+    def seasonality():
+        # Cold: no on-disk cache and an empty in-process cache, so the curve is computed
+        seasonality_module._curves.clear()
+        engine = SeasonalityEngine(start_date=date(2024, 1, 1), days=365, cache_dir=None)
+        state['calendar'] = engine.get_daily_multipliers()
+        return len(state['calendar'])
+
+    def seasonality_cached():
+        # Warm: the curve computed by the cold stage is served from memory
+        return len(SeasonalityEngine(start_date=date(2024, 1, 1), days=365, cache_dir=None).get_daily_multipliers())
+
+    def order_factory():
+        # Generation only, chunks are dropped right away
+        factory = OrderFactory(state['products'], state['customers'])
+        lines = 0
+        for shard in plan_shards(state['calendar'], shops, SEED):
+            shop = shard['shop']
+            for _, line_items in factory.iter_order_chunks(
+                shard['dates'], shop['base'] * shard['multipliers'], shop['id'], shop['currency'],
+                shard['chunk_rows'], rng=np.random.default_rng(shard['seed_seq'])
+            ):
+                lines += len(line_items)
+        return lines
+
+    def csv_export():
+        # main.py end to end, writing every raw table as CSV
+        generate(workers=workers, seed=SEED, fmt='csv', scale=scale, output_dir=output_dir, db_path=db_path,
+                 num_products=num_products, num_customers=num_customers)
+        return raw_rows()
+
+    def raw_rows():
+        # Every file (single CSV or part) has one header line
+        total = 0
+        for root, _, files in os.walk(output_dir):
+            for name in files:
+                with open(os.path.join(root, name), 'rb') as f:
+                    total += sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1
+        return total
+
+    def load():
+        load_data(db_path=db_path, data_dir=output_dir, fmt='csv')
+        return state['raw_rows']
+
+    def dbt_marts():
+        return run_dbt(db_path, work_dir)
+
+    def export():
+        export_tables(db_path=db_path, export_dir=export_dir, force=True)
+        with open(os.path.join(export_dir, MANIFEST_FILE)) as f:
+            return sum(entry['rows'] for entry in json.load(f).values())
+
+    results = []
+    try:
+        for stage, func in [
+            ('product_generator', products),
+            ('customer_generator', customers),
+            ('seasonality_engine', seasonality),
+            ('seasonality_cached', seasonality_cached),
+            ('order_factory', order_factory),
+            ('csv_export', csv_export),
+            ('load_duckdb', load),
+            ('dbt_marts', dbt_marts),
+            ('export_bi_tables', export)
+        ]:
+            result = run_stage(stage, func)
+            if stage == 'csv_export':
+                state['raw_rows'] = result['rows']
+            results.append(dict(result, scale=scale))
+            print(f"{scale:>6g} {stage:<20} {result['wall_s']:>9.2f} {result['peak_rss_mb']:>9.1f} "
+                  f"{result['rows']:>10} {result['rows_per_s'] or 0:>12.0f}", flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    """Full hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Prints wall time vs the baseline per (scale, stage); returns the regressed stages."""
+    reference = {(r['scale'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    print(f"\nvs baseline ({baseline.get('commit')}, {baseline.get('created_at')}):")
+    print(f"{'scale':>6} {'stage':<20} {'wall_s':>9} {'base_s':>9} {'ratio':>7}")
+    for r in results:
+        ref = reference.get((r['scale'], r['stage']))
+        if ref is None or not ref['wall_s']:
+            continue
+        ratio = r['wall_s'] / ref['wall_s']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(r)
+        print(f"{r['scale']:>6g} {r['stage']:<20} {r['wall_s']:>9.2f} {ref['wall_s']:>9.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage at several scale factors.")
+    parser.add_argument('--scales', default='1,10,100',
+                        help="Comma-separated scale factors for shop volumes, products and customers")
+    parser.add_argument('--workers', type=int, default=1, help="Workers for the order generation in main.py")
+    parser.add_argument('--output', default=None,
+                        help="Results file (default: benchmarks/results/pipeline_<timestamp>.json)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed slowdown vs baseline before a stage counts as regressed (default: 0.2)")
+    args = parser.parse_args()
+    commit = git_commit()
+    if args.save_baseline and commit is None:
+        parser.error("--save-baseline needs the git commit the baseline is measured at (git rev-parse failed)")
+
+    print(f"{'scale':>6} {'stage':<20} {'wall_s':>9} {'peak_mb':>9} {'rows':>10} {'rows_per_s':>12}")
+    results = []
+    for scale in [float(s) for s in args.scales.split(',')]:
+        results.extend(run_scale(scale, args.workers))
+
+    run = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'results': results
+    }
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        print(f"No baseline at {args.baseline} (store one with --save-baseline)")
+
+if __name__ == "__main__":
+    main()
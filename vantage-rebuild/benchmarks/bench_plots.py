@@ -0,0 +1,78 @@
+import sys
+import os
+
+# Add data_generation/src and viz to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../viz')))
+
+import argparse
+import tempfile
+import time
+import duckdb
+import matplotlib.pyplot as plt
+import seaborn as sns
+from generate_plots import setup_style, plot_data, data_tables, MAX_POINTS
+from main import OUTPUT_DIR
+
+
+def raw_rows_plots(data_dir, fmt, output_dir):
+    """
+    Baseline: the raw tables pulled into pandas and plotted row by row
+    (seaborn KDE histogram, every day and every product drawn).
+    """
+    con = duckdb.connect()
+    tables = data_tables(data_dir, fmt)
+    orders = con.execute(f"SELECT order_date, shop_id FROM {tables['raw_orders']}").df()
+    products = con.execute(f"SELECT category, avg_price_eur, popularity_score FROM {tables['raw_products']}").df()
+    con.close()
+
+    setup_style()
+    daily = orders.groupby(['order_date', 'shop_id']).size().unstack(fill_value=0)
+    plt.figure(figsize=(12, 6))
+    for shop in daily.columns:
+        plt.plot(daily.index, daily[shop], label=shop, linewidth=1.0)
+    plt.savefig(os.path.join(output_dir, 'raw_daily_orders.png'), dpi=150)
+    plt.close()
+
+    plt.figure(figsize=(10, 6))
+    sns.histplot(data=products, x='avg_price_eur', hue='category', kde=True, element="step", palette='viridis')
+    plt.savefig(os.path.join(output_dir, 'raw_price_distribution.png'), dpi=150)
+    plt.close()
+
+    plt.figure(figsize=(10, 6))
+    scores = products['popularity_score'].sort_values(ascending=False).to_numpy()
+    plt.plot(range(len(scores)), scores, color='#e74c3c', linewidth=2)
+    plt.fill_between(range(len(scores)), 0, scores, color='#e74c3c', alpha=0.1)
+    plt.savefig(os.path.join(output_dir, 'raw_pareto_affinity.png'), dpi=150)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plot time from raw rows vs DuckDB aggregates on generated data.")
+    parser.add_argument('--data-dir', default=OUTPUT_DIR, help="Generated raw files (default: data_generation/output)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='parquet', help="Format of the raw files")
+    parser.add_argument('--workers', type=int, default=None, help="Rendering processes of the aggregate path")
+    parser.add_argument('--skip-raw', action='store_true', help="Only time the aggregate path")
+    args = parser.parse_args()
+
+    con = duckdb.connect()
+    tables = data_tables(args.data_dir, args.format)
+    n_orders = con.execute(f"SELECT count(*) FROM {tables['raw_orders']}").fetchone()[0]
+    n_products = con.execute(f"SELECT count(*) FROM {tables['raw_products']}").fetchone()[0]
+    con.close()
+    print(f"{n_orders} orders, {n_products} products")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        plot_data(output_dir, data_dir=args.data_dir, fmt=args.format, workers=args.workers, max_points=MAX_POINTS)
+        aggregated = time.perf_counter() - start
+        print(f"aggregates + downsampling: {aggregated:.2f} s")
+
+        if not args.skip_raw:
+            start = time.perf_counter()
+            raw_rows_plots(args.data_dir, args.format, output_dir)
+            raw = time.perf_counter() - start
+            print(f"raw rows + seaborn KDE:    {raw:.2f} s ({raw / aggregated:.1f}x)")
+
+if __name__ == "__main__":
+    main()
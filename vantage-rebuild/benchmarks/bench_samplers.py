@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+import time
+import numpy as np
+from samplers import AliasSampler
+
+
+def time_per_draw(n, draws, seed):
+    """ns per draw for one day-sized call: alias table vs np.random.choice(p=...)."""
+    rng = np.random.default_rng(seed)
+    weights = rng.zipf(2.0, size=n).astype(np.float64)
+
+    start = time.perf_counter()
+    sampler = AliasSampler(weights)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(20):
+        sampler.sample(rng, draws)
+    alias_ns = (time.perf_counter() - start) / (20 * draws) * 1e9
+
+    legacy_ns = None
+    if n <= 1_000_000:
+        legacy = np.random.RandomState(seed)
+        start = time.perf_counter()
+        for _ in range(5):
+            legacy.choice(n, size=draws, p=sampler.probs)
+        legacy_ns = (time.perf_counter() - start) / (5 * draws) * 1e9
+    return build_s, alias_ns, legacy_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the alias samplers used by OrderFactory (distribution checks: tests/test_samplers.py)."
+    )
+    parser.add_argument('--sizes', default='1000,100000,1000000,10000000',
+                        help="Population sizes for the timing run")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'population':>11} {'build_s':>8} {'alias_ns/draw':>14} {'choice_ns/draw':>15}")
+    for n in [int(s) for s in args.sizes.split(',')]:
+        build_s, alias_ns, legacy_ns = time_per_draw(n, draws=1000, seed=args.seed)
+        legacy = f"{legacy_ns:>15.1f}" if legacy_ns is not None else f"{'-':>15}"
+        print(f"{n:>11} {build_s:>8.2f} {alias_ns:>14.1f} {legacy}")
+
+if __name__ == "__main__":
+    main()
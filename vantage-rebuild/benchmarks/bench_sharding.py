@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Add data_generation/src to path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import argparse
+import heapq
+import shutil
+import tempfile
+import time
+from datetime import date
+import numpy as np
+from generators import ProductGenerator, CustomerGenerator
+from seasonality import SeasonalityEngine
+from sharding import SHARD_ORDERS, generate_sharded, plan_shards
+from main import SHOPS
+
+NUM_PRODUCTS = 500
+NUM_CUSTOMERS = 5000
+SEED = 42
+
+
+def speedup_bound(loads, workers):
+    """
+    Best speedup the shard sizes allow on `workers` cores: the pool hands out
+    shards in order to the first free worker, so the slowest worker's total
+    load bounds the wall time.
+    """
+    finish = [0.0] * workers
+    for load in loads:
+        heapq.heapreplace(finish, finish[0] + load)
+    return sum(loads) / max(finish)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard balance and worker scaling of the order generation.")
+    parser.add_argument('--scale', type=float, default=20.0, help="Multiplier on the shop base volumes")
+    parser.add_argument('--workers', default='1,2,4,8', help="Comma-separated worker counts")
+    parser.add_argument('--shard-orders', type=int, default=SHARD_ORDERS, help="Expected orders per shard")
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(',')]
+
+    calendar_df = SeasonalityEngine(start_date=date(2024, 1, 1), days=365).get_daily_multipliers()
+    shops = [dict(shop, base=shop['base'] * args.scale) for shop in SHOPS]
+    products = ProductGenerator(num_products=NUM_PRODUCTS).generate()
+    customers = CustomerGenerator(num_customers=NUM_CUSTOMERS).generate()
+
+    shards = plan_shards(calendar_df, shops, SEED, shard_orders=args.shard_orders)
+    loads = np.array([float((s['shop']['base'] * s['multipliers']).sum()) for s in shards])
+    print(f"scale {args.scale:g}: {len(shards)} shards, expected orders per shard "
+          f"min {loads.min():.0f} / median {np.median(loads):.0f} / max {loads.max():.0f}, "
+          f"largest shard {loads.max() / loads.sum():.1%} of the total")
+    print(f"cpu cores available: {os.cpu_count()}")
+
+    print(f"{'workers':>7} {'orders_s':>9} {'speedup':>8} {'bound':>6}")
+    baseline = None
+    for workers in worker_counts:
+        output_dir = tempfile.mkdtemp(prefix='vantage_bench_sharding_')
+        try:
+            start = time.perf_counter()
+            generate_sharded(products, customers, calendar_df, shops, SEED, output_dir,
+                             workers=workers, shard_orders=args.shard_orders)
+            seconds = time.perf_counter() - start
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        baseline = baseline or seconds
+        print(f"{workers:>7} {seconds:>9.2f} {baseline / seconds:>7.2f}x {speedup_bound(loads, workers):>5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 
 import numpy as np
 import pandas as pd
-from faker import Faker
-import uuid
+import instrumentation
+from samplers import AliasSampler
 
-# Initialize Faker
-fake = Faker(['de_DE'])
+# Catalog categories with their sampling weight and price/return profile
+CATEGORIES = ['Ausrüstung', 'Bekleidung', 'Schuhe']
+CATEGORY_WEIGHTS = np.array([0.3, 0.4, 0.3])
+# Log-Normal price parameters per category (same order as CATEGORIES)
+#   Ausrüstung: expensive but low returns (approx 150)
+#   Bekleidung: mid price, mid return rate (approx 80)
+#   Schuhe: expensive, high return rate (approx 120)
+PRICE_MU = np.array([5.0, 4.4, 4.8])
+PRICE_SIGMA = np.array([0.7, 0.6, 0.5])
+RETURN_PROBS = np.array([0.05, 0.15, 0.30])
+PRICE_MIN, PRICE_MAX = 20, 800
+
+# Product columns the order engine reads (large-catalog mode keeps only these)
+FACTORY_PRODUCT_COLUMNS = ['sku_id', 'avg_price_eur', 'unit_cost_eur', 'return_prob', 'popularity_score']
 
 class ProductGenerator:
     def __init__(self, num_products=500):
@@ -14,59 +26,52 @@ class ProductGenerator:
     def generate(self):
         """
         Generates a product catalog with Log-Normal prices and Pareto weights.
+        Vectorized: per-category parameters are looked up by category index,
+        so every column is drawn in one call (same values as drawing product
+        by product from the global NumPy seed).
+        """
+        return self._generate_block(0, self.num_products)
+
+    def iter_chunks(self, chunk_rows):
+        """
+        Large-catalog mode: yields the catalog in blocks of chunk_rows SKUs, so
+        a million-SKU catalog can be written without ever holding all of it.
+        Same distributions as generate(), drawn block by block.
         """
+        for start in range(0, self.num_products, chunk_rows):
+            yield self._generate_block(start, min(chunk_rows, self.num_products - start))
+
+    def _generate_block(self, start, size):
         # SKU IDs
-        skus = range(10000, 10000 + self.num_products)
-        
-        # Categories
-        categories = ['Ausrüstung', 'Bekleidung', 'Schuhe']
-        cat_weights = [0.3, 0.4, 0.3]
-        
-        cats = np.random.choice(categories, size=self.num_products, p=cat_weights)
+        skus = np.arange(10000 + start, 10000 + start + size, dtype=np.int64)
         
-        # Base Price Logic (Log-Normal)
-        # We handle this by iterating or array-wise
-        prices = []
-        return_probs = []
+        # Categories (as category codes; draws the same values as choice over the names)
+        cat_idx = np.random.choice(len(CATEGORIES), size=size, p=CATEGORY_WEIGHTS)
         
-        for cat in cats:
-            if cat == 'Schuhe':
-                # Expensive, high return rate
-                p = np.random.lognormal(mean=4.8, sigma=0.5) # approx 120
-                r = 0.30
-            elif cat == 'Bekleidung':
-                # Mid price, mid return rate
-                p = np.random.lognormal(mean=4.4, sigma=0.6) # approx 80
-                r = 0.15
-            else: # Ausrüstung
-                # Expensive but low returns
-                p = np.random.lognormal(mean=5.0, sigma=0.7) # approx 150
-                r = 0.05
-            
-            # Clip limits
-            p = max(20, min(p, 800))
-            prices.append(round(p, 2))
-            return_probs.append(r)
+        # Base Price Logic (Log-Normal), one draw per product with its category's parameters
+        prices = np.random.lognormal(mean=PRICE_MU[cat_idx], sigma=PRICE_SIGMA[cat_idx])
+        # Clip limits
+        prices = np.round(np.clip(prices, PRICE_MIN, PRICE_MAX), 2)
             
         # Sales Rank (Pareto 80/20)
         # Using a Zipfian/Power law for weights
         # Lower rank = higher sales. We need 'weights' for sampling.
         # We can simulate this by assigning a random 'popularity_score' from a Pareto distribution
-        popularity = np.random.pareto(a=2.5, size=self.num_products)
+        popularity = np.random.pareto(a=2.5, size=size)
         
         df = pd.DataFrame({
             'sku_id': skus,
-            'category': cats,
+            'category': pd.Categorical.from_codes(cat_idx, categories=CATEGORIES),
             'avg_price_eur': prices,
-            'return_prob': return_probs,
+            'return_prob': RETURN_PROBS[cat_idx],
             'popularity_score': popularity
         })
         
         # Standard Cost (COGS) is 40-60% of Price
-        df['unit_cost_eur'] = df['avg_price_eur'] * np.random.uniform(0.40, 0.60, size=self.num_products)
+        df['unit_cost_eur'] = df['avg_price_eur'] * np.random.uniform(0.40, 0.60, size=size)
         df['unit_cost_eur'] = df['unit_cost_eur'].round(2)
         
-        df['product_name'] = [f"{c} Model {i}" for i, c in enumerate(df['category'])]
+        df['product_name'] = df['category'].astype(str) + ' Model ' + pd.Series(np.arange(start, start + size)).astype(str)
         
         return df
 
@@ -75,7 +80,8 @@ class CustomerGenerator:
         self.num_customers = num_customers
         
     def generate(self):
-        ids = [uuid.uuid4().hex[:8] for _ in range(self.num_customers)]
+        # Integer surrogate keys: deterministic and far cheaper than hex strings
+        ids = np.arange(1, self.num_customers + 1, dtype=np.int64)
         # Assign an activity score (how often they buy)
         # Zipfian distribution again for realistic LTV
         activity = np.random.zipf(a=2.0, size=self.num_customers)
@@ -87,13 +93,33 @@ class CustomerGenerator:
             'activity_prob': activity_prob
         })
 
+# Basket size distribution (Geometric-like), shared by the row-wise and batch paths
+BASKET_SIZES = np.array([1, 2, 3, 4])
+BASKET_PROBS = np.array([0.50, 0.30, 0.15, 0.05])
+DISCOUNT_PROB = 0.05
+DISCOUNT_FACTOR = 0.90
+
+
 class OrderFactory:
-    def __init__(self, product_df, customer_df):
+    def __init__(self, product_df, customer_df, seed=None):
         self.products = product_df
         self.customers = customer_df
-        # Create sampling probabilities for products
-        self.prod_probs = self.products['popularity_score'] / self.products['popularity_score'].sum()
+        # Array-backed columns for the batch engine (no .loc lookups per line)
+        self.rng = np.random.default_rng(seed)
+        self._sku_ids = self.products['sku_id'].to_numpy()
+        self._prices = self.products['avg_price_eur'].to_numpy(dtype=np.float64)
+        self._costs = self.products['unit_cost_eur'].to_numpy(dtype=np.float64)
+        self._return_probs = self.products['return_prob'].to_numpy(dtype=np.float64)
+        self._customer_ids = self.customers['customer_id'].to_numpy()
+        # Weighted samplers are built once here; each draw is then O(1)
+        self._prod_sampler = AliasSampler(self.products['popularity_score'])
+        self._cust_sampler = AliasSampler(self.customers['activity_prob'])
+        self._basket_sampler = AliasSampler(BASKET_PROBS)
+        # Running ids for the row-wise path
+        self._next_order_id = 1
+        self._next_line_id = 1
         
+    @instrumentation.profiled
     def generate_orders_for_day(self, date_obj, expected_vol, shop_id, currency):
         """
         Generates N orders for a specific day.
@@ -104,36 +130,29 @@ class OrderFactory:
         if n_orders == 0:
             return [], []
             
-        # Select customers
-        cust_ids = np.random.choice(
-            self.customers['customer_id'], 
-            size=n_orders, 
-            p=self.customers['activity_prob']
-        )
+        # Select customers (same alias tables as the batch engine, drawn from the global NumPy stream)
+        cust_ids = self._customer_ids[self._cust_sampler.sample(np.random, n_orders)]
         
         orders = []
         line_items = []
         
         for cid in cust_ids:
-            oid = uuid.uuid4().hex[:12]
+            oid = self._next_order_id
+            self._next_order_id += 1
             
             # Basket Size (Geometric-like)
             # P(1)=0.5, P(2)=0.3...
-            basket_size = np.random.choice([1, 2, 3, 4], p=[0.50, 0.30, 0.15, 0.05])
+            basket_size = BASKET_SIZES[self._basket_sampler.sample(np.random, 1)[0]]
             
             # Select Products
             # Simple weighted sampling for now (Ignoring cross-sell logic for MVP speed)
-            selected_indices = np.random.choice(
-                self.products.index, 
-                size=basket_size, 
-                p=self.prod_probs, 
-                replace=False # Unique items per basket usually
-            )
+            # Unique items per basket usually
+            selected_indices = self._prod_sampler.sample_distinct(np.random, [basket_size])[0]
             
             basket_revenue = 0
             
             for idx in selected_indices:
-                prod = self.products.loc[idx]
+                prod = self.products.iloc[idx]
                 qty = 1 # 90% chance of 1
                 
                 # Dynamic Price (Event Day?)
@@ -142,14 +161,14 @@ class OrderFactory:
                 price_paid = prod['avg_price_eur']
                 
                 # Apply Discount Logic (Simple 5% chance of 10% off)
-                if np.random.random() < 0.05:
-                    price_paid *= 0.90
+                if np.random.random() < DISCOUNT_PROB:
+                    price_paid *= DISCOUNT_FACTOR
                     
                 # Return Logic
                 did_return = np.random.random() < prod['return_prob']
                 
                 line_items.append({
-                    'line_id': uuid.uuid4().hex[:12],
+                    'line_id': self._next_line_id,
                     'order_id': oid,
                     'sku_id': prod['sku_id'],
                     'qty': qty,
@@ -157,6 +176,7 @@ class OrderFactory:
                     'unit_cost': prod['unit_cost_eur'],
                     'is_returned': did_return
                 })
+                self._next_line_id += 1
                 
             orders.append({
                 'order_id': oid,
@@ -168,3 +188,87 @@ class OrderFactory:
             
         return orders, line_items
 
+    @instrumentation.profiled
+    def generate_orders_batch(self, dates, expected_vols, shop_id, currency, rng=None,
+                              order_id_start=1, line_id_start=1):
+        """
+        Vectorized counterpart of generate_orders_for_day for a whole date range.
+        Draws the same distributions (Poisson volume, activity-weighted customers,
+        basket sizes, popularity-weighted products without replacement, discounts
+        and returns) as NumPy arrays instead of per-row Python objects.
+        Orders and line items get consecutive int64 ids from order_id_start /
+        line_id_start on.
+        Dates come in (and go out) as datetime64[D], shop and currency as categoricals.
+        Returns: (orders_df, line_items_df)
+        """
+        rng = self.rng if rng is None else rng
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        expected_vols = np.broadcast_to(np.asarray(expected_vols, dtype=np.float64), dates.shape)
+
+        # Orders per day and their customers
+        orders_per_day = rng.poisson(expected_vols)
+        n_orders = int(orders_per_day.sum())
+        cust_idx = self._cust_sampler.sample(rng, n_orders)
+        order_ids = np.arange(order_id_start, order_id_start + n_orders, dtype=np.int64)
+
+        # Compact columns: shop and currency as 1-byte categoricals, dates as datetime64
+        single = np.zeros(n_orders, dtype=np.int8)
+        orders_df = pd.DataFrame({
+            'order_id': order_ids,
+            'customer_id': self._customer_ids[cust_idx],
+            'shop_id': pd.Categorical.from_codes(single, categories=[shop_id]),
+            'order_date': np.repeat(dates, orders_per_day),
+            'currency_code': pd.Categorical.from_codes(single, categories=[currency])
+        })
+
+        # Basket sizes, then distinct popularity-weighted products per order
+        basket_sizes = BASKET_SIZES[self._basket_sampler.sample(rng, n_orders)]
+        baskets = self._prod_sampler.sample_distinct(rng, basket_sizes)
+
+        # Flatten to the line item grain (row-major keeps lines grouped by order)
+        in_basket = baskets >= 0
+        prod_idx = baskets[in_basket]
+        n_lines = prod_idx.size
+
+        price_paid = self._prices[prod_idx].copy()
+        discounted = rng.random(n_lines) < DISCOUNT_PROB
+        price_paid[discounted] *= DISCOUNT_FACTOR
+
+        line_items_df = pd.DataFrame({
+            'line_id': np.arange(line_id_start, line_id_start + n_lines, dtype=np.int64),
+            'order_id': np.repeat(order_ids, basket_sizes),
+            'sku_id': self._sku_ids[prod_idx],
+            'qty': np.ones(n_lines, dtype=np.int8),
+            'unit_price_paid': np.round(price_paid, 2),
+            'unit_cost': self._costs[prod_idx],
+            'is_returned': rng.random(n_lines) < self._return_probs[prod_idx]
+        })
+
+        return orders_df, line_items_df
+
+    def iter_order_chunks(self, dates, expected_vols, shop_id, currency, chunk_rows, rng=None, id_base=0):
+        """
+        Streaming variant of generate_orders_batch: groups consecutive days so
+        each chunk holds roughly chunk_rows expected orders (at least one day)
+        and yields one (orders_df, line_items_df) pair per chunk. Ids continue
+        across chunks, starting at id_base + 1.
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        expected_vols = np.broadcast_to(np.asarray(expected_vols, dtype=np.float64), dates.shape)
+
+        # Chunk boundaries from the cumulative expected volume
+        chunk_ids = np.floor(np.cumsum(expected_vols) / max(chunk_rows, 1)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, chunk_ids[1:] != chunk_ids[:-1]]) if dates.size else []
+        bounds = list(starts) + [dates.size]
+
+        next_order_id = next_line_id = id_base + 1
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            with instrumentation.stage('generate_chunk', cat='chunk', shop=shop_id, days=int(stop - start)) as st:
+                orders_df, line_items_df = self.generate_orders_batch(
+                    dates[start:stop], expected_vols[start:stop], shop_id, currency, rng=rng,
+                    order_id_start=next_order_id, line_id_start=next_line_id
+                )
+                st.add(rows=len(line_items_df), orders=len(orders_df))
+            next_order_id += len(orders_df)
+            next_line_id += len(line_items_df)
+            yield orders_df, line_items_df
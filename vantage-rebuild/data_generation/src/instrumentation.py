@@ -0,0 +1,256 @@
+import functools
+import io
+import json
+import os
+import resource
+import threading
+import time
+
+# Output formats: a flat JSON event list, or the Chrome trace format
+# (open in chrome://tracing or https://ui.perfetto.dev)
+TRACE_FORMATS = ['json', 'chrome']
+
+# The active tracer; None means instrumentation is off and every hook is a no-op
+_tracer = None
+
+
+class _NullStage:
+    """Stand-in returned while tracing is disabled: costs one call and nothing else."""
+    def add(self, rows=0, bytes=0, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    def __init__(self, tracer, name, cat, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.attrs = attrs
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, rows=0, bytes=0, **attrs):
+        """Adds row/byte counts (and any extra attributes) to the running stage."""
+        self.rows += rows
+        self.bytes += bytes
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self, time.perf_counter_ns())
+        return False
+
+
+class Tracer:
+    """
+    Collects one event per finished stage: start, duration, rows, bytes and
+    the process memory high-water mark at the end of the stage.
+    """
+    def __init__(self, profile=False):
+        self.events = []
+        self.lock = threading.Lock()
+        if profile:
+            # Only profiling runs pay for importing cProfile
+            import cProfile
+            self.profiler = cProfile.Profile()
+        else:
+            self.profiler = None
+        self.profile_depth = 0
+        # cProfile stats shipped back by worker processes, merged on write
+        self.worker_profiles = []
+
+    def record(self, stage, end):
+        event = {
+            'name': stage.name,
+            'cat': stage.cat,
+            'ts_us': stage.start // 1000,
+            'dur_us': (end - stage.start) // 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'rows': stage.rows,
+            'bytes': stage.bytes,
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'attrs': stage.attrs
+        }
+        with self.lock:
+            self.events.append(event)
+
+
+def enable(profile=False):
+    """Starts a fresh trace; with profile=True, @profiled functions also run under cProfile."""
+    global _tracer
+    _tracer = Tracer(profile=profile)
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def profiling():
+    return _tracer is not None and _tracer.profiler is not None
+
+
+def stage(name, cat='stage', **attrs):
+    """
+    Context manager timing one stage or chunk:
+
+        with instrumentation.stage('load_table', table=name) as st:
+            ...
+            st.add(rows=n, bytes=size)
+    """
+    if _tracer is None:
+        return _NULL_STAGE
+    return Stage(_tracer, name, cat, attrs)
+
+
+def profiled(func):
+    """
+    Opt-in cProfile hook for hot functions. Calls are only profiled when the
+    trace was enabled with profile=True; nested calls share one session.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = _tracer
+        if tracer is None or tracer.profiler is None:
+            return func(*args, **kwargs)
+        if tracer.profile_depth == 0:
+            tracer.profiler.enable()
+        tracer.profile_depth += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            tracer.profile_depth -= 1
+            if tracer.profile_depth == 0:
+                tracer.profiler.disable()
+    return wrapper
+
+
+def drain():
+    """Returns and clears the recorded events (worker processes ship them back this way)."""
+    if _tracer is None:
+        return []
+    with _tracer.lock:
+        events, _tracer.events = _tracer.events, []
+    return events
+
+
+def extend(events):
+    """Merges events recorded elsewhere (e.g. in a worker process) into the trace."""
+    if _tracer is not None and events:
+        with _tracer.lock:
+            _tracer.events.extend(events)
+
+
+def drain_profile():
+    """
+    Returns and clears the cProfile stats collected so far as a plain dict
+    (picklable, so worker processes can ship it back); None if not profiling.
+    """
+    if not profiling():
+        return None
+    import cProfile
+
+    profiler, _tracer.profiler = _tracer.profiler, cProfile.Profile()
+    profiler.create_stats()
+    return profiler.stats
+
+
+def extend_profile(stats):
+    """Merges cProfile stats recorded elsewhere (see drain_profile) into the profile."""
+    if profiling() and stats:
+        _tracer.worker_profiles.append(stats)
+
+
+class _ProfileSnapshot:
+    """Stats from drain_profile in the shape pstats.Stats loads (a profiler with create_stats)."""
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _chrome_trace(events):
+    return {
+        'traceEvents': [
+            {
+                'name': e['name'],
+                'cat': e['cat'],
+                'ph': 'X',
+                'ts': e['ts_us'],
+                'dur': e['dur_us'],
+                'pid': e['pid'],
+                'tid': e['tid'],
+                'args': dict(e['attrs'], rows=e['rows'], bytes=e['bytes'], peak_rss_mb=e['peak_rss_mb'])
+            }
+            for e in events
+        ],
+        'displayTimeUnit': 'ms'
+    }
+
+
+def write(path, fmt='json'):
+    """
+    Writes the trace to `path`. If profiling was on, the cProfile stats go to
+    `<path>.prof` (load with pstats or snakeviz) and the top entries are printed.
+    """
+    if _tracer is None:
+        return
+    events = sorted(drain(), key=lambda e: e['ts_us'])
+    if events:
+        # Timestamps relative to the first event
+        origin = events[0]['ts_us']
+        for e in events:
+            e['ts_us'] -= origin
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(_chrome_trace(events) if fmt == 'chrome' else {'events': events}, f, indent=1, default=str)
+    print(f"Trace written to {path} ({len(events)} events)")
+
+    if _tracer.profiler is not None:
+        import pstats
+
+        # This process's stats plus the workers' (pstats rejects empty ones)
+        out = io.StringIO()
+        stats = pstats.Stats(stream=out)
+        for profile in [drain_profile()] + _tracer.worker_profiles:
+            if profile:
+                stats.add(_ProfileSnapshot(profile))
+        stats.dump_stats(f"{path}.prof")
+        stats.sort_stats('cumulative').print_stats(15)
+        print(out.getvalue())
+        print(f"Profile written to {path}.prof")
+
+
+def add_arguments(parser):
+    """The --trace/--trace-format/--profile options shared by the pipeline scripts."""
+    parser.add_argument('--trace', default=None,
+                        help="Record per-stage timings, rows, bytes and memory to this file")
+    parser.add_argument('--trace-format', choices=TRACE_FORMATS, default='json',
+                        help="Trace file format: json or chrome (chrome://tracing, Perfetto)")
+    parser.add_argument('--profile', action='store_true',
+                        help="With --trace: also cProfile the hot functions (written to <trace>.prof)")
+
+
+def check_arguments(parser, args):
+    """Rejects --profile without --trace (the profile is written next to the trace file)."""
+    if args.profile and not args.trace:
+        parser.error("--profile needs --trace (the stats are written to <trace>.prof)")
@@ -1,45 +1,302 @@
-
-import duckdb
+import argparse
+import glob
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+import instrumentation
+from schemas import RAW_SCHEMAS, OUTPUT_FORMATS, arrow_schema
+
+
+# Resolved from this file, so the defaults work from any working directory
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.normpath(os.path.join(SRC_DIR, '../../data/vantage.duckdb'))
+CSV_DIR = os.path.normpath(os.path.join(SRC_DIR, '../output'))
+
+# Bookkeeping for incremental loads: one row per loaded source file
+MANIFEST_TABLE = '_load_manifest'
+
+# Provenance column added to raw tables in incremental mode, so a changed
+# file can be replaced without touching the rows of any other file
+SOURCE_COLUMN = '_source_file'
+
+
+def source_path(table_name, data_dir, fmt):
+    """
+    Where a raw table lives: its directory of part files (every Parquet
+    table, CSV tables written by the order shards) or its single CSV file.
+    """
+    directory = os.path.join(data_dir, table_name)
+    if fmt == 'parquet' or os.path.isdir(directory):
+        return directory
+    return os.path.join(data_dir, f'{table_name}.csv')
+
+
+def source_files(table_name, data_dir, fmt):
+    """The individual files (partitions) that make up a raw table."""
+    path = source_path(table_name, data_dir, fmt)
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, f'*.{fmt}')))
+    return [path] if os.path.exists(path) else []
+
+
+def sql_string(value):
+    """Quotes a value (e.g. a file path) as an SQL string literal, doubling embedded quotes."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def read_query(table_name, path, fmt):
+    """
+    Builds the SELECT that reads a raw table file (or glob) with its declared
+    schema, so nothing has to be type-sniffed. The query is plain text (it is
+    embedded as a subquery elsewhere), so the path goes in as a quoted literal.
+    """
+    schema = RAW_SCHEMAS[table_name]
+    if fmt == 'parquet':
+        # Parquet is typed already; the casts pin the layout to the shared schema
+        cols = ", ".join(f"CAST({col} AS {dtype}) AS {col}" for col, dtype in schema.items())
+        return f"SELECT {cols} FROM read_parquet({sql_string(path)})"
+
+    columns = ", ".join(f"'{col}': '{dtype}'" for col, dtype in schema.items())
+    return f"SELECT * FROM read_csv({sql_string(path)}, header = true, columns = {{{columns}}})"
+
+
+def source_query(table_name, data_dir, fmt):
+    """
+    Builds the SELECT that reads one whole raw table with its declared schema.
+    Returns (query, path) or (None, path) if missing.
+    """
+    path = source_path(table_name, data_dir, fmt)
+    if not source_files(table_name, data_dir, fmt):
+        return None, path
+    if os.path.isdir(path):
+        return read_query(table_name, os.path.join(path, f'*.{fmt}'), fmt), path
+    return read_query(table_name, path, fmt), path
+
+
+def create_raw_table(con, table_name, track_source=False):
+    """(Re)creates an empty raw table with its declared schema."""
+    cols = [f"{col} {dtype}" for col, dtype in RAW_SCHEMAS[table_name].items()]
+    if track_source:
+        cols.append(f"{SOURCE_COLUMN} VARCHAR")
+    else:
+        # Rows no longer map to tracked files: the next incremental run starts clean
+        _forget_loads(con, table_name)
+    con.execute(f"DROP TABLE IF EXISTS {table_name}")
+    con.execute(f"CREATE TABLE {table_name} ({', '.join(cols)})")
+
+
+def append_frame(con, table_name, df):
+    """
+    Appends an in-memory chunk to a raw table without touching the filesystem:
+    the chunk is registered as an Arrow table and DuckDB scans it in place.
+    """
+    import pyarrow as pa
+
+    chunk = pa.Table.from_pandas(df, schema=arrow_schema(table_name), preserve_index=False)
+    con.register('_chunk', chunk)
+    try:
+        con.execute(f"INSERT INTO {table_name} SELECT * FROM _chunk")
+    finally:
+        con.unregister('_chunk')
+
+
+def _ensure_manifest(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            table_name VARCHAR,
+            file_path VARCHAR,
+            file_size BIGINT,
+            mtime_ns BIGINT,
+            content_hash VARCHAR,
+            row_count BIGINT,
+            loaded_at TIMESTAMP,
+            PRIMARY KEY (table_name, file_path)
+        )
+    """)
+
+
+def _forget_loads(con, table_name):
+    _ensure_manifest(con)
+    con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ?", [table_name])
 
 
-DB_PATH = '../../data/vantage.duckdb'
-CSV_DIR = '../output'
+def _file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
 
-def load_data():
-    print(f"Connecting to {DB_PATH}...")
-    con = duckdb.connect(DB_PATH)
-    
-    files = {
-        'raw_orders': 'raw_orders.csv',
-        'raw_line_items': 'raw_line_items.csv',
-        'raw_products': 'raw_products.csv',
-        'raw_marketing_daily': 'raw_marketing_daily.csv',
-        'raw_budget': 'raw_budget.csv'
+def load_table_incremental(con, table_name, data_dir, fmt):
+    """
+    Brings one raw table in line with its source files, touching only what
+    changed since the last run:
+    - unchanged files (same size and mtime, or same content hash) are skipped
+    - new files are appended
+    - changed files have their previous rows replaced
+    - files that disappeared have their rows removed
+    Returns (files_loaded, files_skipped). Must run inside a transaction.
+    Without any source files the table is left as it is, like in a full load.
+    """
+    files = [os.path.abspath(p) for p in source_files(table_name, data_dir, fmt)]
+    if not files:
+        print(f"WARNING: {source_path(table_name, data_dir, fmt)} not found!")
+        return 0, 0
+
+    known = {
+        row[0]: row[1:]
+        for row in con.execute(
+            f"SELECT file_path, file_size, mtime_ns, content_hash FROM {MANIFEST_TABLE} WHERE table_name = ?",
+            [table_name]
+        ).fetchall()
     }
-    
-    for table_name, csv_file in files.items():
-        csv_path = os.path.join(CSV_DIR, csv_file)
-        if os.path.exists(csv_path):
-            print(f"Loading {table_name} from {csv_path}...")
-            # Drop and Reload pattern
-            con.execute(f"DROP TABLE IF EXISTS {table_name}")
-            con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_csv_auto('{csv_path}')")
-        else:
-            print(f"WARNING: {csv_path} not found!")
-
-    # Verify
-    print("\nTable Counts:")
-    for table in files.keys():
+    # First incremental run for this table (or after a full reload): start clean
+    if not known:
+        create_raw_table(con, table_name, track_source=True)
+
+    loaded, skipped = 0, 0
+    for path in files:
+        stat = os.stat(path)
+        previous = known.get(path)
+        if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+            skipped += 1
+            continue
+
+        content_hash = _file_hash(path)
+        if previous is not None and previous[2] == content_hash:
+            # Rewritten with identical content: just refresh the fingerprint
+            con.execute(
+                f"UPDATE {MANIFEST_TABLE} SET file_size = ?, mtime_ns = ? WHERE table_name = ? AND file_path = ?",
+                [stat.st_size, stat.st_mtime_ns, table_name, path]
+            )
+            skipped += 1
+            continue
+
+        with instrumentation.stage('load_file', cat='chunk', table=table_name, file=os.path.basename(path)) as st:
+            if previous is not None:
+                con.execute(f"DELETE FROM {table_name} WHERE {SOURCE_COLUMN} = ?", [path])
+            row_count = con.execute(
+                f"INSERT INTO {table_name} SELECT *, ? FROM ({read_query(table_name, path, fmt)})", [path]
+            ).fetchone()[0]
+            st.add(rows=row_count, bytes=stat.st_size)
+        con.execute(
+            f"INSERT OR REPLACE INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?, current_timestamp)",
+            [table_name, path, stat.st_size, stat.st_mtime_ns, content_hash, row_count]
+        )
+        loaded += 1
+
+    for path in set(known) - set(files):
+        con.execute(f"DELETE FROM {table_name} WHERE {SOURCE_COLUMN} = ?", [path])
+        con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ? AND file_path = ?", [table_name, path])
+
+    return loaded, skipped
+
+
+def configure(con, threads=None, memory_limit=None):
+    """DuckDB resource settings for the load; None keeps DuckDB's default (all cores, 80% of RAM)."""
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if memory_limit:
+        con.execute(f"SET memory_limit = {sql_string(memory_limit)}")
+
+
+def load_table(con, table_name, data_dir, fmt):
+    """
+    Full reload of one raw table on its own cursor, so several tables can load
+    at the same time. Returns the row count reported by the CREATE TABLE AS
+    itself (no extra count(*) scan), or None if the source is missing.
+    """
+    query, path = source_query(table_name, data_dir, fmt)
+    if query is None:
+        print(f"WARNING: {path} not found!")
+        return None
+
+    print(f"Loading {table_name} from {path}...")
+    cur = con.cursor()
+    try:
+        with instrumentation.stage('load_table', table=table_name) as st:
+            # Drop and Reload pattern, as one statement
+            rows = cur.execute(f"CREATE OR REPLACE TABLE {table_name} AS {query}").fetchone()[0]
+            st.add(rows=rows, bytes=sum(os.path.getsize(f) for f in source_files(table_name, data_dir, fmt)))
+    finally:
+        cur.close()
+    return rows
+
+
+def load_data(db_path=DB_PATH, data_dir=CSV_DIR, fmt='csv', incremental=False, workers=None,
+              threads=None, memory_limit=None):
+    # Imported here: generating data (main.py imports DB_PATH) must not pay for duckdb
+    import duckdb
+
+    print(f"Connecting to {db_path}...")
+    con = duckdb.connect(db_path)
+    configure(con, threads=threads, memory_limit=memory_limit)
+    _ensure_manifest(con)
+
+    if incremental:
+        # All tables move forward together or not at all
+        con.execute("BEGIN TRANSACTION")
         try:
-            count = con.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
-            print(f"- {table}: {count}")
-        except:
-            print(f"- {table}: ERROR")
+            for table_name in RAW_SCHEMAS:
+                with instrumentation.stage('load_table', table=table_name, incremental=True) as st:
+                    loaded, skipped = load_table_incremental(con, table_name, data_dir, fmt)
+                    st.add(files_loaded=loaded, files_skipped=skipped)
+                print(f"Loading {table_name}: {loaded} new/changed file(s), {skipped} unchanged")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        # Row counts come from the manifest, not from scanning the tables
+        counts = dict(con.execute(
+            f"SELECT table_name, sum(row_count) FROM {MANIFEST_TABLE} GROUP BY 1"
+        ).fetchall())
+        print("\nTable Counts:")
+        for table in RAW_SCHEMAS:
+            print(f"- {table}: {counts.get(table, 0)}")
+
+        con.close()
+        print("Database Load Complete.")
+        return
+
+    # Every table loads on its own cursor, concurrently
+    with ThreadPoolExecutor(max_workers=workers or len(RAW_SCHEMAS)) as pool:
+        counts = dict(zip(RAW_SCHEMAS, pool.map(lambda table: load_table(con, table, data_dir, fmt), RAW_SCHEMAS)))
+
+    for table_name, rows in counts.items():
+        if rows is not None:
+            # A full reload invalidates what the incremental mode knew about this table
+            _forget_loads(con, table_name)
+
+    # Row counts as reported by the loads themselves
+    print("\nTable Counts:")
+    for table, count in counts.items():
+        print(f"- {table}: {count if count is not None else 'not loaded'}")
 
     con.close()
     print("Database Load Complete.")
 
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Load the generated raw tables into DuckDB.")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Format the raw tables were generated in (default: csv)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only load new or changed files (tracked in the _load_manifest table)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Tables loaded concurrently in full mode (default: all at once)")
+    parser.add_argument('--threads', type=int, default=None, help="DuckDB threads (default: one per core)")
+    parser.add_argument('--memory-limit', default=None, help="DuckDB memory_limit, e.g. 4GB (default: 80%% of RAM)")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+    instrumentation.check_arguments(parser, args)
+    if args.trace:
+        instrumentation.enable(profile=args.profile)
+    load_data(fmt=args.format, incremental=args.incremental, workers=args.workers,
+              threads=args.threads, memory_limit=args.memory_limit)
+    if args.trace:
+        instrumentation.write(args.trace, args.trace_format)
+
 if __name__ == "__main__":
-    load_data()
+    cli()
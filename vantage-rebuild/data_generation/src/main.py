@@ -2,128 +2,199 @@
 import pandas as pd
 import numpy as np
 from datetime import date
+import argparse
 import os
+import instrumentation
 from seasonality import SeasonalityEngine
-from generators import ProductGenerator, CustomerGenerator, OrderFactory
+from generators import ProductGenerator, CustomerGenerator, FACTORY_PRODUCT_COLUMNS
+from sharding import SHARD_ORDERS, generate_sharded
+from writers import CHUNK_ROWS, DIRECT_FORMAT, open_chunk_writer, reset_output, write_table
+from schemas import OUTPUT_FORMATS
+from load_duckdb import DB_PATH
 
-OUTPUT_DIR = '../output'
+OUTPUT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../output'))
 
-def main():
-    print("Starting Data Generation...")
-    np.random.seed(42) # Ensure reproducibility
+# Define Shops and their Base Volumes (Lambda)
+# DE: High Vol, EUR
+# AT: Med Vol, EUR
+# CH: Low Vol, CHF
+SHOPS = [
+    {'id': 'DE', 'base': 50, 'currency': 'EUR'},
+    {'id': 'AT', 'base': 15, 'currency': 'EUR'},
+    {'id': 'CH', 'base': 10, 'currency': 'CHF'}
+]
 
-    # 1. Setup Data Objects
-    print("Generating Products & Customers...")
-    prod_gen = ProductGenerator(num_products=500)
-    products_df = prod_gen.generate()
-    
-    cust_gen = CustomerGenerator(num_customers=5000)
-    customers_df = cust_gen.generate()
+
+def stream_products(prod_gen, output_dir, fmt, chunk_rows, con=None):
+    """
+    Large-catalog mode: writes raw_products chunk by chunk and keeps only the
+    numeric columns the order engine needs (no names, no category strings).
+    """
+    reset_output(output_dir, 'raw_products', fmt, con=con)
+    parts = []
+    with open_chunk_writer(output_dir, 'raw_products', fmt, con=con) as out:
+        for chunk in prod_gen.iter_chunks(chunk_rows):
+            out.write(chunk)
+            parts.append(chunk[FACTORY_PRODUCT_COLUMNS])
+    return pd.concat(parts, ignore_index=True)
+
+
+def marketing_spend(calendar_df, shops):
+    """
+    Daily marketing spend per shop: roughly 15% of *expected* revenue
+    (based on lambda + avg price ~100 EUR), with +/- 10% noise because
+    marketing isn't perfect. Noise is drawn as one (days x shops) array,
+    in the same order as the former day-by-day loop.
+    """
+    base = np.array([shop['base'] for shop in shops])
+    lambda_val = calendar_df['total_multiplier'].to_numpy()[:, None] * base
+    est_rev = lambda_val * 100
+    spend_noise = np.random.normal(1.0, 0.1, size=est_rev.shape)
+    daily_spend = est_rev * 0.15 * spend_noise
+
+    return pd.DataFrame({
+        'date': np.repeat(calendar_df['date'].dt.date.to_numpy(), len(shops)),
+        'shop_id': np.tile([shop['id'] for shop in shops], len(calendar_df)),
+        'spend_amount': np.round(daily_spend.ravel(), 2),
+        'currency': np.tile([shop['currency'] for shop in shops], len(calendar_df))
+    })
+
+
+def budget_from_revenue(revenue_df):
+    """
+    Monthly budget from gross revenue per (shop_id, month, currency_code).
+    Scramble: Budget is rarely accurate. Add random variance +/- 5%.
+    """
+    budget_agg = revenue_df.groupby(['shop_id', 'month', 'currency_code'])['revenue'].sum().reset_index()
+    noise = np.random.uniform(0.95, 1.05, size=len(budget_agg))
+
+    return pd.DataFrame({
+        'month': budget_agg['month'].dt.start_time.dt.date,
+        'shop_id': budget_agg['shop_id'],
+        'currency': budget_agg['currency_code'],
+        'budget_revenue': np.round(budget_agg['revenue'].to_numpy() * noise, 2)
+    })
+
+
+def main(workers=1, seed=42, chunk_rows=CHUNK_ROWS, fmt='csv', scale=1.0, output_dir=OUTPUT_DIR,
+         db_path=DB_PATH, num_products=500, num_customers=5000, days=365, shard_orders=SHARD_ORDERS):
+    print("Starting Data Generation...")
+    np.random.seed(seed) # Ensure reproducibility
     
-    # Export static data
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    products_df.to_csv(f'{OUTPUT_DIR}/raw_products.csv', index=False)
-    # We assume customer data isn't needed for the dashboard (GDPR simplification), but we use it for logic
+    # Direct mode hands every chunk to DuckDB in-process instead of writing raw files
+    con = None
+    if fmt == DIRECT_FORMAT:
+        import duckdb
+        if workers > 1:
+            # The DuckDB connection cannot be shared across processes (see generate_sharded)
+            print(f"WARNING: --format direct generates in-process, ignoring workers={workers}")
+            workers = 1
+        print(f"Direct mode: writing raw tables into {db_path}")
+        con = duckdb.connect(db_path)
+
+    try:
+        # 1. Setup Data Objects
+        print("Generating Products & Customers...")
+        os.makedirs(output_dir, exist_ok=True)
+        with instrumentation.stage('products') as st:
+            prod_gen = ProductGenerator(num_products=num_products)
+            if num_products > chunk_rows:
+                # Catalogs beyond one chunk are streamed straight to the output
+                products_df = stream_products(prod_gen, output_dir, fmt, chunk_rows, con=con)
+            else:
+                products_df = prod_gen.generate()
+            st.add(rows=len(products_df))
     
-    # 2. Setup Seasonality
-    print("Calculating Seasonality...")
-    engine = SeasonalityEngine(start_date=date(2024, 1, 1), days=365)
-    calendar_df = engine.get_daily_multipliers()
+        with instrumentation.stage('customers') as st:
+            cust_gen = CustomerGenerator(num_customers=num_customers)
+            customers_df = cust_gen.generate()
+            st.add(rows=len(customers_df))
     
-    # 3. Generate Orders Loop
-    print("Generating Orders (This may take a moment)...")
-    factory = OrderFactory(products_df, customers_df)
+        # Export static data
+        if num_products <= chunk_rows:
+            write_table(products_df, output_dir, 'raw_products', fmt, con=con)
+        # We assume customer data isn't needed for the dashboard (GDPR simplification), but we use it for logic
     
-    all_orders = []
-    all_lines = []
+        # 2. Setup Seasonality
+        print("Calculating Seasonality...")
+        with instrumentation.stage('seasonality') as st:
+            engine = SeasonalityEngine(start_date=date(2024, 1, 1), days=days)
+            calendar_df = engine.get_daily_multipliers()
+            st.add(rows=len(calendar_df))
     
-    # Define Shops and their Base Volumes (Lambda)
-    # DE: High Vol, EUR
-    # AT: Med Vol, EUR
-    # CH: Low Vol, CHF
-    shops = [
-        {'id': 'DE', 'base': 50, 'currency': 'EUR'},
-        {'id': 'AT', 'base': 15, 'currency': 'EUR'},
-        {'id': 'CH', 'base': 10, 'currency': 'CHF'}
-    ]
+        # 3. Generate Orders (Sharded Batch Engine)
+        print(f"Generating Orders with {workers} worker(s)...")
     
-    marketing_spend = []
-    monthly_budget = []
+        # Volume scale factor for load tests (1.0 = the reference dataset)
+        shops = [dict(shop, base=shop['base'] * scale) for shop in SHOPS]
     
-    for _, row in calendar_df.iterrows():
-        curr_date = row['date'].date()
-        mult = row['total_multiplier']
-        
-        for shop in shops:
-            # A. Transaction Generation
-            # Apply multiplier to base lambda
-            lambda_val = shop['base'] * mult
-            orders, lines = factory.generate_orders_for_day(
-                curr_date, lambda_val, shop['id'], shop['currency']
+        # A. Transaction Generation
+        # Month x shop shards (busy ones split into day ranges) with their own RNG streams;
+        # each streams chunks into a part file
+        with instrumentation.stage('orders', workers=workers, fmt=fmt) as st:
+            shard_results = generate_sharded(
+                products_df, customers_df, calendar_df, shops, seed, output_dir,
+                workers=workers, chunk_rows=chunk_rows, fmt=fmt, con=con, shard_orders=shard_orders
             )
-            
-            all_orders.extend(orders)
-            all_lines.extend(lines)
-            
-            # B. Marketing Spend Generation (Daily Aggregated)
-            # Logic: Spend is roughly 15% of *expected* revenue (based on lambda + avg price)
-            # Avg Price ~100 EUR. 
-            est_rev = lambda_val * 100
-            # Add noise to spend (Marketing isn't perfect)
-            spend_noise = np.random.normal(1.0, 0.1) # +/- 10%
-            daily_spend = est_rev * 0.15 * spend_noise
-            
-            marketing_spend.append({
-                'date': curr_date,
-                'shop_id': shop['id'],
-                'spend_amount': round(daily_spend, 2),
-                'currency': shop['currency']
-            })
-
-    # Convert to DF
-    orders_df = pd.DataFrame(all_orders)
-    lines_df = pd.DataFrame(all_lines)
-    marketing_df = pd.DataFrame(marketing_spend)
-    
-    # Export
-    print(f"Exporting {len(orders_df)} orders and {len(lines_df)} line items...")
-    orders_df.to_csv(f'{OUTPUT_DIR}/raw_orders.csv', index=False)
-    lines_df.to_csv(f'{OUTPUT_DIR}/raw_line_items.csv', index=False)
-    marketing_df.to_csv(f'{OUTPUT_DIR}/raw_marketing_daily.csv', index=False)
+            n_orders = sum(r['orders'] for r in shard_results)
+            n_lines = sum(r['line_items'] for r in shard_results)
+            st.add(rows=n_lines, orders=n_orders)
     
-    # 4. Generate Budget (Monthly)
-    # We aggregate the actuals we just created, smooth them, and save as budget
-    print("Generating Budget...")
-    # Add month col to marketing_df (just for easy grouping proxy - ideally use orders, but let's assume budget follows marketing plan)
-    # Better: Aggregate orders_df + lines_df to get actual revenue per month
+        # B. Marketing Spend Generation (Daily Aggregated), one row per day x shop
+        with instrumentation.stage('marketing') as st:
+            marketing_df = marketing_spend(calendar_df, shops)
+            # Appended to the output in chunks of chunk_rows
+            reset_output(output_dir, 'raw_marketing_daily', fmt, con=con)
+            with open_chunk_writer(output_dir, 'raw_marketing_daily', fmt, con=con) as marketing_out:
+                for start in range(0, len(marketing_df), chunk_rows):
+                    marketing_out.write(marketing_df.iloc[start:start + chunk_rows])
+            st.add(rows=marketing_out.rows)
     
-    # Join orders and lines for calculation
-    full_df = orders_df.merge(lines_df, on='order_id')
-    # Calculate revenue
-    full_df['revenue'] = full_df['unit_price_paid'] * full_df['qty']
-    # Filter returns for net revenue budget? Usually budget is Gross or Net. Let's do Gross for simplicity.
-    full_df['month'] = pd.to_datetime(full_df['order_date']).dt.to_period('M')
+        # Orders, line items and marketing were already written chunk by chunk
+        print(f"Exported {n_orders} orders and {n_lines} line items...")
     
-    budget_agg = full_df.groupby(['shop_id', 'month', 'currency_code'])['revenue'].sum().reset_index()
-    
-    budget_rows = []
-    for _, row in budget_agg.iterrows():
-        # Scramble: Budget is rarely accurate. 
-        # Add random variance +/- 5%
-        noise = np.random.uniform(0.95, 1.05)
-        budget_rev = row['revenue'] * noise
-        
-        budget_rows.append({
-            'month': row['month'].start_time.date(),
-            'shop_id': row['shop_id'],
-            'currency': row['currency_code'],
-            'budget_revenue': round(budget_rev, 2)
-        })
-        
-    budget_df = pd.DataFrame(budget_rows)
-    budget_df.to_csv(f'{OUTPUT_DIR}/raw_budget.csv', index=False)
-
+        # 4. Generate Budget (Monthly)
+        # We aggregate the actuals we just created, smooth them, and save as budget
+        print("Generating Budget...")
+        # Each shard kept a running gross revenue total for its shop/month
+        # Filter returns for net revenue budget? Usually budget is Gross or Net. Let's do Gross for simplicity.
+        with instrumentation.stage('budget') as st:
+            budget_df = budget_from_revenue(pd.DataFrame([r['revenue'] for r in shard_results]))
+            write_table(budget_df, output_dir, 'raw_budget', fmt, con=con)
+            st.add(rows=len(budget_df))
+    finally:
+        # Direct mode: release the database file even if generation fails
+        if con is not None:
+            con.close()
     print("Data Generation Complete.")
 
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Generate the raw Vantage Alpin datasets.")
+    parser.add_argument('--workers', type=int, default=1, help="Processes for order generation (default: 1)")
+    parser.add_argument('--seed', type=int, default=42, help="Master seed for all random streams")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help=f"Rows generated and written per chunk (default: {CHUNK_ROWS})")
+    parser.add_argument('--shard-orders', type=int, default=SHARD_ORDERS,
+                        help=f"Expected orders per shard; busier shop-months are split into day ranges (default: {SHARD_ORDERS})")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS + [DIRECT_FORMAT], default='csv',
+                        help="Output format of the raw tables; 'direct' loads them straight into DuckDB")
+    parser.add_argument('--db-path', default=DB_PATH, help="DuckDB file used by --format direct")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier on the shop base volumes")
+    parser.add_argument('--products', type=int, default=500, help="Size of the product catalog")
+    parser.add_argument('--customers', type=int, default=5000, help="Size of the customer base")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+    instrumentation.check_arguments(parser, args)
+    if args.format == DIRECT_FORMAT and args.workers > 1:
+        parser.error("--format direct writes through one DuckDB connection and cannot use --workers > 1")
+    if args.trace:
+        instrumentation.enable(profile=args.profile)
+    main(workers=args.workers, seed=args.seed, chunk_rows=args.chunk_rows, fmt=args.format, scale=args.scale,
+         db_path=args.db_path, num_products=args.products, num_customers=args.customers,
+         shard_orders=args.shard_orders)
+    if args.trace:
+        instrumentation.write(args.trace, args.trace_format)
+
 if __name__ == "__main__":
-    main()
+    cli()
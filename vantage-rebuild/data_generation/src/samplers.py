@@ -0,0 +1,100 @@
+import numpy as np
+
+
+class AliasSampler:
+    """
+    Weighted sampler over the indices 0..n-1 using Walker's alias method.
+
+    The tables are built once (vectorized, O(n log n)); afterwards every draw
+    costs O(1) and consumes one uniform, no matter how large n is. This is
+    what lets the order engine scale to millions of SKUs and customers,
+    where np.random.choice(p=...) rebuilds a CDF of size n on every call.
+    """
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or weights.size == 0:
+            raise ValueError("weights must be a non-empty 1-D array")
+        if (weights < 0).any() or not np.isfinite(weights).all() or weights.sum() <= 0:
+            raise ValueError("weights must be finite, non-negative and not all zero")
+
+        self.n = weights.size
+        self.probs = weights / weights.sum()
+        # Items that can be drawn at all (zero weight never comes up)
+        self.n_nonzero = int(np.count_nonzero(weights))
+        self.prob, self.alias = self._build(self.probs * self.n)
+
+    @staticmethod
+    def _build(scaled):
+        """
+        Vose's construction, done in rounds instead of one item at a time:
+        every round hands all current small columns (mass < 1) to the large
+        ones, walking the larges' excess mass by cumulative sums. A large
+        that drops below 1 becomes a small column of the next round.
+        """
+        n = scaled.size
+        q = scaled.copy()
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n, dtype=np.int64 if n > np.iinfo(np.int32).max else np.int32)
+
+        small = np.flatnonzero(q < 1.0)
+        large = np.flatnonzero(q >= 1.0)
+        while small.size and large.size:
+            deficit = 1.0 - q[small]
+            excess = np.cumsum(q[large] - 1.0)
+            # Owner = the large whose excess interval contains the start of the small's deficit
+            starts = np.cumsum(deficit) - deficit
+            owner = np.minimum(np.searchsorted(excess, starts, side='right'), large.size - 1)
+
+            prob[small] = q[small]
+            alias[small] = large[owner]
+            q[large] -= np.bincount(owner, weights=deficit, minlength=large.size)
+
+            drained = q[large] < 1.0
+            small = large[drained]
+            large = large[~drained]
+
+        # Whatever is left holds (up to rounding) exactly one column of mass
+        prob[small] = 1.0
+        prob[large] = 1.0
+        # ...except a column without any weight, which must never come up
+        empty = small[scaled[small] == 0]
+        prob[empty] = 0.0
+        alias[empty] = np.argmax(scaled)
+        return prob, alias
+
+    def sample(self, rng, size):
+        """Draws `size` indices with replacement."""
+        scaled = rng.random(size) * self.n
+        column = np.minimum(scaled.astype(np.int64), self.n - 1)
+        # The fractional part decides between the column's own index and its alias
+        keep = (scaled - column) < self.prob[column]
+        return np.where(keep, column, self.alias[column])
+
+    def sample_distinct(self, rng, sizes):
+        """
+        Draws sizes[i] distinct indices for every row i (e.g. the products of
+        one basket), matching sequential weighted sampling without replacement
+        (np.random.choice(replace=False)): position k is drawn from the weights
+        and redrawn while it collides with positions < k of the same row.
+        With sizes much smaller than n collisions are rare, so this costs
+        little more than one draw per item.
+        Like np.random.choice, raises ValueError if a row asks for more items
+        than have nonzero weight (the redraw loop would never finish).
+        Returns an (n_rows, max(sizes)) array padded with -1.
+        """
+        sizes = np.asarray(sizes)
+        if (sizes > self.n_nonzero).any():
+            raise ValueError(
+                f"cannot draw {int(sizes.max())} distinct items, only {self.n_nonzero} have nonzero weight"
+            )
+        n_rows = sizes.size
+        max_size = int(sizes.max()) if n_rows else 0
+        picks = np.full((n_rows, max_size), -1, dtype=np.int64)
+        for k in range(max_size):
+            rows = np.flatnonzero(sizes > k)
+            while rows.size:
+                draw = self.sample(rng, rows.size)
+                picks[rows, k] = draw
+                clash = (picks[rows, :k] == draw[:, None]).any(axis=1)
+                rows = rows[clash]
+        return picks
@@ -0,0 +1,232 @@
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from seasonality import SeasonalityEngine, EVENT_CALENDAR
+from generators import ProductGenerator, CustomerGenerator, RETURN_PROBS, FACTORY_PRODUCT_COLUMNS
+from sharding import SHARD_TABLES, plan_shards, run_shard, set_tables
+from writers import CHUNK_ROWS, reset_output
+from main import OUTPUT_DIR, SHOPS
+
+SCENARIO_DIR = os.path.join(OUTPUT_DIR, 'scenarios')
+
+# Immutable tables shared with the workers as memory-mapped .npy files (one set per catalog size);
+# return_prob is rebuilt per scenario from the category code
+SHARED_PRODUCT_COLUMNS = [c for c in FACTORY_PRODUCT_COLUMNS if c != 'return_prob'] + ['category_code']
+SHARED_CUSTOMER_COLUMNS = ['customer_id', 'activity_prob']
+
+# What a sweep writes next to its scenario_id=NNN/ partitions (_shared only while running)
+SWEEP_FILES = ['scenarios.json', 'summary.csv', '_shared']
+
+# Per-process memory maps: (shared_dir, catalog size) -> (products_df, customers_df)
+_shared = {}
+
+
+def build_grid(scales, black_week, return_scales, catalog_sizes):
+    """Cartesian product of the swept parameters, one dict per scenario."""
+    grid = []
+    for scale, multiplier, return_scale, num_products in itertools.product(
+            scales, black_week, return_scales, catalog_sizes):
+        grid.append({
+            'scenario_id': len(grid),
+            'volume_scale': scale,
+            'black_week_multiplier': multiplier,
+            'return_scale': return_scale,
+            'num_products': num_products
+        })
+    return grid
+
+
+def _shared_path(shared_dir, num_products, name):
+    return os.path.join(shared_dir, f'catalog_{num_products}', f'{name}.npy')
+
+
+def share_tables(shared_dir, num_products, num_customers, seed):
+    """
+    Generates products and customers once per catalog size, exactly like
+    main.py (same seed, same draw order), and stores their columns as .npy
+    files the workers memory-map instead of receiving pickled copies.
+    """
+    np.random.seed(seed)
+    products = ProductGenerator(num_products=num_products).generate()
+    customers = CustomerGenerator(num_customers=num_customers).generate()
+    products['category_code'] = products['category'].cat.codes.to_numpy()
+
+    os.makedirs(os.path.join(shared_dir, f'catalog_{num_products}'), exist_ok=True)
+    for col in SHARED_PRODUCT_COLUMNS:
+        np.save(_shared_path(shared_dir, num_products, f'products_{col}'), products[col].to_numpy())
+    for col in SHARED_CUSTOMER_COLUMNS:
+        np.save(_shared_path(shared_dir, num_products, f'customers_{col}'), customers[col].to_numpy())
+
+
+def _load_shared(shared_dir, num_products):
+    # Read-only memory maps: every worker reads the same pages from the OS cache
+    key = (shared_dir, num_products)
+    if key not in _shared:
+        load = lambda name: np.load(_shared_path(shared_dir, num_products, name), mmap_mode='r')
+        products = pd.DataFrame({col: load(f'products_{col}') for col in SHARED_PRODUCT_COLUMNS}, copy=False)
+        customers = pd.DataFrame({col: load(f'customers_{col}') for col in SHARED_CUSTOMER_COLUMNS}, copy=False)
+        _shared[key] = (products, customers)
+    return _shared[key]
+
+
+def scenario_calendar(black_week_multiplier):
+    """The default calendar with the Black Week multiplier swapped out (cached per config)."""
+    events = [dict(event, multiplier=black_week_multiplier) if event['name'] == 'Black Week' else event
+              for event in EVENT_CALENDAR]
+    engine = SeasonalityEngine(start_date=date(2024, 1, 1), days=365, config={'events': events})
+    return engine.get_daily_multipliers()
+
+
+def scenario_kpis(scenario, shard_results):
+    """KPI outcome of one scenario from its shard summaries (revenue in local currency)."""
+    revenue = pd.DataFrame([dict(r['revenue'], orders=r['orders'], line_items=r['line_items'])
+                            for r in shard_results])
+    by_currency = revenue.groupby('currency_code')[['orders', 'revenue', 'returned_revenue']].sum()
+    eur = by_currency.loc['EUR']
+    return dict(
+        scenario,
+        orders=int(revenue['orders'].sum()),
+        line_items=int(revenue['line_items'].sum()),
+        revenue_eur=round(float(eur['revenue']), 2),
+        revenue_chf=round(float(by_currency.loc['CHF', 'revenue']), 2),
+        aov_eur=round(float(eur['revenue'] / eur['orders']), 2) if eur['orders'] else None,
+        return_rate=round(float(by_currency['returned_revenue'].sum() / by_currency['revenue'].sum()), 4)
+    )
+
+
+def run_scenario(scenario, shared_dir, output_dir, seed, chunk_rows):
+    """
+    Generates one scenario's orders and line items into its own Parquet
+    partition (scenario_id=NNN/raw_orders/, .../raw_line_items/).
+    Every scenario uses the same seed (common random numbers), so KPI
+    differences come from the parameters, not from sampling noise.
+    """
+    start = time.perf_counter()
+    products, customers = _load_shared(shared_dir, scenario['num_products'])
+    return_probs = np.minimum(RETURN_PROBS * scenario['return_scale'], 1.0)
+    products = products.assign(return_prob=return_probs[products['category_code'].to_numpy()])
+    set_tables(products, customers)
+
+    calendar_df = scenario_calendar(scenario['black_week_multiplier'])
+    shops = [dict(shop, base=shop['base'] * scenario['volume_scale']) for shop in SHOPS]
+
+    scenario_dir = os.path.join(output_dir, f"scenario_id={scenario['scenario_id']:03d}")
+    for table in SHARD_TABLES:
+        reset_output(scenario_dir, table, 'parquet')
+    results = [run_shard(shard, scenario_dir, 'parquet')
+               for shard in plan_shards(calendar_df, shops, seed, chunk_rows)]
+
+    kpis = scenario_kpis(scenario, results)
+    kpis['seconds'] = round(time.perf_counter() - start, 2)
+    return kpis
+
+
+def _is_sweep_entry(name):
+    return name.startswith('scenario_id=') or name in SWEEP_FILES
+
+
+def clear_sweep(output_dir, force=False):
+    """
+    Removes the partitions and files of a previous sweep from output_dir,
+    nothing else. A directory holding anything else is refused unless
+    force=True (and even then only the sweep's own entries are deleted).
+    """
+    if not os.path.isdir(output_dir):
+        return
+    entries = os.listdir(output_dir)
+    foreign = sorted(name for name in entries if not _is_sweep_entry(name))
+    if foreign and not force:
+        raise ValueError(
+            f"{output_dir} holds files that are not from a scenario sweep ({', '.join(foreign[:5])}); "
+            "pick another --output-dir or pass --force"
+        )
+    for name in entries:
+        if _is_sweep_entry(name):
+            path = os.path.join(output_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+
+def run_sweep(grid, workers=1, seed=42, chunk_rows=CHUNK_ROWS, output_dir=SCENARIO_DIR, num_customers=5000,
+              force=False):
+    """
+    Runs every scenario of the grid, in-process for workers=1 or in a process
+    pool otherwise, and writes scenarios.json (the grid) and summary.csv (KPIs).
+    Only the previous sweep's partitions and files are replaced (see clear_sweep).
+    Returns the KPI summary as a DataFrame.
+    """
+    clear_sweep(output_dir, force)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'scenarios.json'), 'w') as f:
+        json.dump(grid, f, indent=2)
+
+    # Maps of an earlier sweep in this process point at deleted files (or another seed / customer count)
+    _shared.clear()
+    shared_dir = os.path.join(output_dir, '_shared')
+    for num_products in sorted({s['num_products'] for s in grid}):
+        print(f"Sharing catalog of {num_products} products...")
+        share_tables(shared_dir, num_products, num_customers, seed)
+
+    print(f"Running {len(grid)} scenario(s) with {workers} worker(s)...")
+    args = [[shared_dir] * len(grid), [output_dir] * len(grid), [seed] * len(grid), [chunk_rows] * len(grid)]
+    if workers <= 1:
+        results = list(map(run_scenario, grid, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_scenario, grid, *args))
+    _shared.clear()
+    shutil.rmtree(shared_dir)
+
+    summary = pd.DataFrame(results)
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return summary
+
+
+def _floats(value):
+    return [float(v) for v in value.split(',')]
+
+
+def _ints(value):
+    return [int(v) for v in value.split(',')]
+
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run a grid of what-if scenarios in parallel.")
+    parser.add_argument('--scales', type=_floats, default=[1.0], help="Shop volume scale factors, e.g. 0.5,1,2")
+    parser.add_argument('--black-week', type=_floats, default=[3.0], help="Black Week multipliers, e.g. 2,3,4")
+    parser.add_argument('--return-scales', type=_floats, default=[1.0],
+                        help="Factors on the category return probabilities, e.g. 0.5,1,1.5")
+    parser.add_argument('--products', type=_ints, default=[500], help="Catalog sizes, e.g. 500,5000")
+    parser.add_argument('--customers', type=int, default=5000, help="Size of the customer base")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Scenarios run in parallel")
+    parser.add_argument('--seed', type=int, default=42, help="Master seed, shared by all scenarios")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help=f"Rows generated and written per chunk (default: {CHUNK_ROWS})")
+    parser.add_argument('--output-dir', default=SCENARIO_DIR, help="Root of the scenario_id=NNN partitions")
+    parser.add_argument('--force', action='store_true',
+                        help="Run even if --output-dir holds other files (they are left alone)")
+    args = parser.parse_args(argv)
+
+    grid = build_grid(args.scales, args.black_week, args.return_scales, args.products)
+    try:
+        clear_sweep(args.output_dir, args.force)
+    except ValueError as e:
+        parser.error(str(e))
+    summary = run_sweep(grid, workers=args.workers, seed=args.seed, chunk_rows=args.chunk_rows,
+                        output_dir=args.output_dir, num_customers=args.customers, force=args.force)
+    print(summary.to_string(index=False))
+    print(f"Partitions and summary.csv written to {args.output_dir}")
+
+if __name__ == "__main__":
+    cli()
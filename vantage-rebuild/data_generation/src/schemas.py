@@ -0,0 +1,59 @@
+# Single source of truth for the raw table layouts (column -> DuckDB type).
+# Used by the generator writers (Parquet schemas) and by load_duckdb (explicit
+# CSV column types), so nothing has to be sniffed at load time.
+RAW_SCHEMAS = {
+    'raw_orders': {
+        'order_id': 'BIGINT',
+        'customer_id': 'BIGINT',
+        'shop_id': 'VARCHAR',
+        'order_date': 'DATE',
+        'currency_code': 'VARCHAR'
+    },
+    'raw_line_items': {
+        'line_id': 'BIGINT',
+        'order_id': 'BIGINT',
+        'sku_id': 'BIGINT',
+        'qty': 'BIGINT',
+        'unit_price_paid': 'DOUBLE',
+        'unit_cost': 'DOUBLE',
+        'is_returned': 'BOOLEAN'
+    },
+    'raw_products': {
+        'sku_id': 'BIGINT',
+        'category': 'VARCHAR',
+        'avg_price_eur': 'DOUBLE',
+        'return_prob': 'DOUBLE',
+        'popularity_score': 'DOUBLE',
+        'unit_cost_eur': 'DOUBLE',
+        'product_name': 'VARCHAR'
+    },
+    'raw_marketing_daily': {
+        'date': 'DATE',
+        'shop_id': 'VARCHAR',
+        'spend_amount': 'DOUBLE',
+        'currency': 'VARCHAR'
+    },
+    'raw_budget': {
+        'month': 'DATE',
+        'shop_id': 'VARCHAR',
+        'currency': 'VARCHAR',
+        'budget_revenue': 'DOUBLE'
+    }
+}
+
+# Supported on-disk formats for the generated raw data
+OUTPUT_FORMATS = ['csv', 'parquet']
+
+
+def arrow_schema(table):
+    """Returns the pyarrow schema for a raw table."""
+    import pyarrow as pa
+
+    arrow_types = {
+        'VARCHAR': pa.string(),
+        'BIGINT': pa.int64(),
+        'DOUBLE': pa.float64(),
+        'DATE': pa.date32(),
+        'BOOLEAN': pa.bool_()
+    }
+    return pa.schema([(col, arrow_types[dtype]) for col, dtype in RAW_SCHEMAS[table].items()])
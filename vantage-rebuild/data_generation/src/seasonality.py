@@ -1,67 +1,157 @@
 
+import hashlib
+import json
+import os
 import numpy as np
 import pandas as pd
-from datetime import date, timedelta
+from datetime import date
+
+# Recurring events, applied every year of the range: (month, day) windows, both ends inclusive.
+# A window may wrap over New Year (start after end). Later entries win where windows overlap.
+EVENT_CALENDAR = [
+    {'name': 'Summer Sale', 'start': (7, 15), 'end': (7, 30), 'multiplier': 1.5},
+    {'name': 'Black Week', 'start': (11, 20), 'end': (11, 27), 'multiplier': 3.0},
+    {'name': 'Christmas Rush', 'start': (12, 1), 'end': (12, 15), 'multiplier': 1.8},
+    {'name': 'Christmas Slump', 'start': (12, 24), 'end': (12, 26), 'multiplier': 0.2},
+]
+
+DEFAULT_CONFIG = {
+    # Linear trend: +10% per 365 days
+    'trend_growth': 0.10,
+    # Mon: 0.9, Tue: 0.85, Wed: 0.9, Thu: 0.95, Fri: 1.0, Sat: 1.2, Sun: 1.3
+    'week_weights': [0.9, 0.85, 0.9, 0.95, 1.0, 1.2, 1.3],
+    # Payday effect: last days of the month (day > 25)
+    'payday_after_day': 25,
+    'payday_multiplier': 1.15,
+    'events': EVENT_CALENDAR,
+}
+
+# Version of the curve formula in _compute, part of every cache key:
+# bump it whenever _compute changes, so no stale cached curve is ever served
+CURVE_VERSION = 2
+
+# Precomputed curves, one .npy per (start, days, config), in the user's cache
+# directory ($XDG_CACHE_HOME, default ~/.cache) rather than the source tree
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'vantage', 'seasonality'
+)
+
+# In-process cache: (start, days, config key) -> (total_multiplier, event_multiplier)
+_curves = {}
+
+
+def config_key(config):
+    """
+    Stable short hash of a seasonality config and the curve version
+    (same config and formula -> same key in every process).
+    """
+    payload = json.dumps({'curve_version': CURVE_VERSION, 'config': config}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _month_day(month, day):
+    return month * 100 + day
+
+
+def check_events(events):
+    """Event names must be unique: masks and plots look events up by name."""
+    names = [event['name'] for event in events]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate event names in the seasonality config: {', '.join(duplicates)}")
+
+
+def event_mask(dates, event):
+    """Boolean mask of one event's window over a DatetimeIndex, for any number of years."""
+    md = _month_day(dates.month.to_numpy(), dates.day.to_numpy())
+    start, end = _month_day(*event['start']), _month_day(*event['end'])
+    if start <= end:
+        return (md >= start) & (md <= end)
+    return (md >= start) | (md <= end)
+
+
+def event_masks(dates, events):
+    """Boolean mask per event name over a DatetimeIndex, for any number of years."""
+    check_events(events)
+    return {event['name']: event_mask(dates, event) for event in events}
+
 
 class SeasonalityEngine:
-    def __init__(self, start_date=date(2024, 1, 1), days=366):
+    def __init__(self, start_date=date(2024, 1, 1), days=366, config=None, cache_dir=CACHE_DIR):
         self.start_date = start_date
         self.days = days
-        self.date_range = [start_date + timedelta(days=x) for x in range(days)]
-        self.df = pd.DataFrame({'date': self.date_range})
-        self.df['date'] = pd.to_datetime(self.df['date'])
-        self.df['day_of_week'] = self.df['date'].dt.dayofweek # 0=Mon, 6=Sun
-        self.df['month'] = self.df['date'].dt.month
-        self.df['day'] = self.df['date'].dt.day
+        self.config = DEFAULT_CONFIG if config is None else {**DEFAULT_CONFIG, **config}
+        check_events(self.config['events'])
+        self.cache_dir = cache_dir
+        self.key = (start_date.isoformat(), days, config_key(self.config))
+        self.dates = pd.date_range(start_date, periods=days, freq='D', unit='s')
 
-    def get_daily_multipliers(self):
+    def cache_path(self):
+        start, days, key = self.key
+        return os.path.join(self.cache_dir, f"{start}_{days}_{key}.npy")
+
+    def event_masks(self):
+        return event_masks(self.dates, self.config['events'])
+
+    def _compute(self):
         """
-        Returns a DataFrame with a 'multiplier' column combining:
+        All components in one vectorized pass over the date range:
         1. Linear Trend (Growth)
         2. Weekly Seasonality (Weekend Spikes)
         3. Monthly Payday Effect
         4. Special Events (Black Friday, etc.)
         """
-        # 1. Linear Trend (10% YoY growth)
-        # y = mx + c. start at 1.0, end at 1.1
-        slope = 0.10 / self.days
-        self.df['trend'] = 1.0 + (self.df.index * slope)
-
-        # 2. Weekly Seasonality
-        # Mon: 0.9, Tue: 0.85, Wed: 0.9, Thu: 0.95, Fri: 1.0, Sat: 1.2, Sun: 1.3
-        week_weights = {0: 0.9, 1: 0.85, 2: 0.9, 3: 0.95, 4: 1.0, 5: 1.2, 6: 1.3}
-        self.df['weekly_seasonal'] = self.df['day_of_week'].map(week_weights)
-
-        # 3. Monthly Payday Effect (Last 5 days of month)
-        # Logic: If day > 25, multiplier = 1.15
-        self.df['monthly_seasonal'] = np.where(self.df['day'] > 25, 1.15, 1.0)
-
-        # 4. Special Events
-        self.df['event_multiplier'] = 1.0
-        
-        # Summer Sale (July 15 - July 30)
-        mask_summer = (self.df['month'] == 7) & (self.df['day'] >= 15) & (self.df['day'] <= 30)
-        self.df.loc[mask_summer, 'event_multiplier'] = 1.5
-
-        # Black Week (Nov 20 - Nov 27)
-        mask_bf = (self.df['month'] == 11) & (self.df['day'] >= 20) & (self.df['day'] <= 27)
-        self.df.loc[mask_bf, 'event_multiplier'] = 3.0
-
-        # Christmas Rush (Dec 1 - Dec 15)
-        mask_xmas = (self.df['month'] == 12) & (self.df['day'] <= 15)
-        self.df.loc[mask_xmas, 'event_multiplier'] = 1.8
-        
-        # Christmas Slump (Dec 24 - Dec 26)
-        mask_xmas_slump = (self.df['month'] == 12) & (self.df['day'] >= 24) & (self.df['day'] <= 26)
-        self.df.loc[mask_xmas_slump, 'event_multiplier'] = 0.2
-
-        # Combine all
-        self.df['total_multiplier'] = (
-            self.df['trend'] * 
-            self.df['weekly_seasonal'] * 
-            self.df['monthly_seasonal'] * 
-            self.df['event_multiplier']
-        )
-        
-        return self.df[['date', 'total_multiplier', 'event_multiplier']]
+        config = self.config
+        # y = mx + c, starting at 1.0
+        slope = config['trend_growth'] / 365
+        trend = 1.0 + (np.arange(self.days) * slope)
+
+        weekly_seasonal = np.asarray(config['week_weights'])[self.dates.dayofweek.to_numpy()]
+        monthly_seasonal = np.where(self.dates.day.to_numpy() > config['payday_after_day'],
+                                    config['payday_multiplier'], 1.0)
+
+        event_multiplier = np.ones(self.days)
+        for event in config['events']:
+            event_multiplier[event_mask(self.dates, event)] = event['multiplier']
+
+        total_multiplier = trend * weekly_seasonal * monthly_seasonal * event_multiplier
+        return total_multiplier, event_multiplier
 
+    def _load_curve(self):
+        """Memory first, then the on-disk cache, computing (and storing) the curve only on a miss."""
+        if self.key in _curves:
+            return _curves[self.key]
+
+        curve = None
+        path = self.cache_path() if self.cache_dir else None
+        if path and os.path.exists(path):
+            cached = np.load(path)
+            if cached.shape == (2, self.days):
+                curve = (cached[0], cached[1])
+
+        if curve is None:
+            curve = self._compute()
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write + rename so parallel runs never read a half-written file
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.vstack(curve))
+                os.replace(tmp_path, path)
+
+        _curves[self.key] = curve
+        return curve
+
+    def get_daily_multipliers(self):
+        """
+        Returns a DataFrame with a 'total_multiplier' column (trend x weekly x
+        payday x events) and the 'event_multiplier' on its own. The curve is
+        cached per (start, days, config), so repeated runs reuse it.
+        """
+        total_multiplier, event_multiplier = self._load_curve()
+        return pd.DataFrame({
+            'date': self.dates,
+            'total_multiplier': total_multiplier.copy(),
+            'event_multiplier': event_multiplier.copy()
+        })
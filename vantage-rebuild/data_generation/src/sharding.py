@@ -0,0 +1,171 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import instrumentation
+from generators import OrderFactory
+from writers import CHUNK_ROWS, DIRECT_FORMAT, open_chunk_writer, reset_output
+
+# Tables written by the order shards (one part file per shard and table)
+SHARD_TABLES = ['raw_orders', 'raw_line_items']
+
+# Every shard owns a block of 2^32 order ids and 2^32 line ids
+# (shard index in the high bits), so ids are unique without coordination
+SHARD_ID_BITS = 32
+
+# Expected orders per shard: larger shop-months are split into day ranges
+# (the 1x reference volume peaks at ~2,600 orders per shop-month and stays unsplit)
+SHARD_ORDERS = 5_000
+
+# Per-process factory, set once by the pool initializer so the product and
+# customer tables are not re-pickled with every shard
+_factory = None
+
+
+def set_tables(products_df, customers_df):
+    """Sets the products and customers that run_shard generates orders from in this process."""
+    global _factory
+    _factory = OrderFactory(products_df, customers_df)
+
+
+def _init_worker(products_df, customers_df, trace=None, profile=False):
+    set_tables(products_df, customers_df)
+    # Pool workers (trace given) may have forked with a copy of the parent's
+    # trace: begin a fresh one, or none
+    if trace:
+        instrumentation.enable(profile=profile)
+    elif trace is not None:
+        instrumentation.disable()
+
+
+def _run_shard_in_worker(shard, output_dir, fmt):
+    # Events (and cProfile stats) recorded in the worker travel back with the shard summary
+    result = run_shard(shard, output_dir, fmt)
+    result['trace'] = instrumentation.drain()
+    result['profile'] = instrumentation.drain_profile()
+    return result
+
+
+def _day_ranges(expected_vols, shard_orders):
+    """
+    Splits a shop-month into consecutive day ranges of at most about
+    shard_orders expected orders each, balanced by cumulative expected volume.
+    Returns (start, stop) index pairs; a month below the target stays whole.
+    """
+    total = float(expected_vols.sum())
+    n_ranges = max(int(np.ceil(total / max(shard_orders, 1))), 1)
+    if n_ranges == 1:
+        return [(0, len(expected_vols))]
+    # Range of each day from the expected volume before it
+    before = np.cumsum(expected_vols) - expected_vols
+    range_ids = np.minimum((before * n_ranges / total).astype(np.int64), n_ranges - 1)
+    starts = np.flatnonzero(np.r_[True, range_ids[1:] != range_ids[:-1]])
+    return list(zip(starts, np.r_[starts[1:], len(expected_vols)]))
+
+
+def plan_shards(calendar_df, shops, seed, chunk_rows=CHUNK_ROWS, shard_orders=SHARD_ORDERS):
+    """
+    Splits the (date range x shop) space into month x shop shards, and
+    shop-months above shard_orders expected orders into day-range sub-shards
+    of similar size, so shards stay balanced at any volume.
+    Each shop-month gets its own RNG stream spawned from the master seed (a
+    split one spawns one child stream per day range) and every shard its own
+    id block, so the combined output only depends on the seed, scale, chunk
+    size and shard_orders, never on the worker count.
+    """
+    months = calendar_df['date'].dt.to_period('M')
+    month_groups = [group for _, group in calendar_df.groupby(months, sort=True)]
+    streams = iter(np.random.SeedSequence(seed).spawn(len(month_groups) * len(shops)))
+
+    shards = []
+    for month_df in month_groups:
+        dates = month_df['date'].to_numpy().astype('datetime64[D]')
+        multipliers = month_df['total_multiplier'].to_numpy()
+        for shop in shops:
+            stream = next(streams)
+            ranges = _day_ranges(shop['base'] * multipliers, shard_orders)
+            seed_seqs = [stream] if len(ranges) == 1 else stream.spawn(len(ranges))
+            for (start, stop), seed_seq in zip(ranges, seed_seqs):
+                shards.append({
+                    'index': len(shards),
+                    'shop': shop,
+                    'month': month_df['date'].iloc[0].to_period('M'),
+                    'dates': dates[start:stop],
+                    'multipliers': multipliers[start:stop],
+                    'seed_seq': seed_seq,
+                    'id_base': len(shards) << SHARD_ID_BITS,
+                    'chunk_rows': chunk_rows
+                })
+    return shards
+
+
+def run_shard(shard, output_dir, fmt='csv', con=None):
+    """
+    Generates one shard chunk by chunk from the tables passed to set_tables,
+    appends each chunk to the shard's part files and returns a small summary
+    (row counts and the shard's gross and returned revenue for the budget
+    step and the scenario KPIs). Memory is bounded by the chunk size.
+    """
+    shop = shard['shop']
+    rng = np.random.default_rng(shard['seed_seq'])
+    chunks = _factory.iter_order_chunks(
+        shard['dates'], shop['base'] * shard['multipliers'], shop['id'], shop['currency'],
+        shard['chunk_rows'], rng=rng, id_base=shard['id_base']
+    )
+
+    # Running totals: a shard lies within one (shop, month), so gross (and
+    # returned) revenue is just the sum over its lines, no join back to the orders needed
+    revenue = returned = 0.0
+    with instrumentation.stage('shard', cat='shard', index=shard['index'], shop=shop['id']) as st, \
+            open_chunk_writer(output_dir, 'raw_orders', fmt, part=shard['index'], con=con) as orders_out, \
+            open_chunk_writer(output_dir, 'raw_line_items', fmt, part=shard['index'], con=con) as lines_out:
+        for orders, lines in chunks:
+            orders_out.write(orders)
+            lines_out.write(lines)
+            price, qty = lines['unit_price_paid'].to_numpy(), lines['qty'].to_numpy()
+            is_returned = lines['is_returned'].to_numpy()
+            revenue += float(price @ qty)
+            returned += float(price[is_returned] @ qty[is_returned])
+        st.add(rows=lines_out.rows, orders=orders_out.rows)
+
+    return {
+        'index': shard['index'],
+        'orders': orders_out.rows,
+        'line_items': lines_out.rows,
+        'revenue': {
+            'shop_id': shop['id'],
+            'month': shard['month'],
+            'currency_code': shop['currency'],
+            'revenue': revenue,
+            'returned_revenue': returned
+        }
+    }
+
+
+def generate_sharded(products_df, customers_df, calendar_df, shops, seed, output_dir,
+                     workers=1, chunk_rows=CHUNK_ROWS, fmt='csv', con=None, shard_orders=SHARD_ORDERS):
+    """
+    Runs all order shards, in-process for workers=1 or in a process pool
+    otherwise. Every shard writes one part file per table, so raw_orders/ and
+    raw_line_items/ are part directories in both CSV and Parquet.
+    In direct mode chunks are appended to the DuckDB connection `con`, which
+    cannot be shared across processes, so generation stays in-process.
+    Returns the shard summaries in shard order.
+    """
+    shards = plan_shards(calendar_df, shops, seed, chunk_rows, shard_orders)
+    for table in SHARD_TABLES:
+        reset_output(output_dir, table, fmt, con=con)
+
+    if workers <= 1 or fmt == DIRECT_FORMAT:
+        set_tables(products_df, customers_df)
+        results = [run_shard(shard, output_dir, fmt, con) for shard in shards]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(products_df, customers_df, instrumentation.enabled(), instrumentation.profiling())
+        ) as pool:
+            results = list(pool.map(_run_shard_in_worker, shards, [output_dir] * len(shards), [fmt] * len(shards)))
+        for result in results:
+            instrumentation.extend(result.pop('trace'))
+            instrumentation.extend_profile(result.pop('profile'))
+
+    return results
@@ -0,0 +1,149 @@
+import os
+import shutil
+
+import instrumentation
+from schemas import arrow_schema
+
+# Default chunk size (rows) for streaming generation and output
+CHUNK_ROWS = 50_000
+
+# Parquet codec for the generated raw data
+PARQUET_COMPRESSION = 'zstd'
+
+# Pseudo-format: write chunks into DuckDB in-process instead of to files
+DIRECT_FORMAT = 'direct'
+
+
+class CsvChunkWriter:
+    """
+    Incremental CSV writer: appends DataFrame chunks to one file and writes the
+    header only once, so nothing has to be accumulated in memory.
+    """
+    def __init__(self, path, table=None):
+        self.path = path
+        self.table = table or os.path.splitext(os.path.basename(path))[0]
+        self.rows = 0
+        self._file = None
+
+    def write(self, df):
+        with instrumentation.stage('write_chunk', cat='chunk', table=self.table) as st:
+            # File sizes are only looked at while tracing
+            before = self.bytes_written() if instrumentation.enabled() else 0
+            self._write(df)
+            if instrumentation.enabled():
+                st.add(rows=len(df), bytes=self.bytes_written() - before)
+        self.rows += len(df)
+
+    def bytes_written(self):
+        return self._file.tell() if self._file is not None else 0
+
+    def _write(self, df):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'w', newline='')
+            df.to_csv(self._file, index=False)
+        elif len(df):
+            df.to_csv(self._file, index=False, header=False)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetChunkWriter(CsvChunkWriter):
+    """
+    Incremental Parquet writer: every chunk becomes (at least) one row group,
+    typed and compressed according to the table's raw schema.
+    """
+    def __init__(self, path, table, compression=PARQUET_COMPRESSION):
+        super().__init__(path, table)
+        self.schema = arrow_schema(table)
+        self.compression = compression
+
+    def bytes_written(self):
+        return os.path.getsize(self.path) if self._file is not None else 0
+
+    def _write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        if len(df):
+            self._file.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+
+class DuckDBChunkWriter(CsvChunkWriter):
+    """
+    Direct mode: appends chunks straight into a raw table on an open DuckDB
+    connection (see load_duckdb.append_frame) instead of writing files.
+    The table itself is (re)created by reset_output.
+    """
+    def __init__(self, con, table):
+        super().__init__(table, table)
+        self.con = con
+
+    def bytes_written(self):
+        # Nothing hits the disk here (DuckDB manages its own file)
+        return 0
+
+    def _write(self, df):
+        from load_duckdb import append_frame
+
+        if len(df):
+            append_frame(self.con, self.table, df)
+
+
+def output_path(output_dir, table, fmt, part=None):
+    """
+    Location of a raw table on disk.
+    Tables written in one go are single CSV files ({table}.csv); tables
+    written by the order shards, and every Parquet table, are directories
+    of part files ({table}/part-*.csv or .parquet). load_duckdb reads each
+    part as one partition, so an incremental load only touches changed parts.
+    """
+    if fmt == 'csv' and part is None:
+        return os.path.join(output_dir, f'{table}.csv')
+    return os.path.join(output_dir, table, f'part-{0 if part is None else part:05d}.{fmt}')
+
+
+def reset_output(output_dir, table, fmt, con=None):
+    """
+    Clears a table's previous output before it is written again. The file
+    formats remove the table's files in every format (CSV file, part
+    directory with CSV or Parquet parts), so a run with another --format
+    leaves no stale copy for load_duckdb to pick up. Direct mode
+    (re)creates the DuckDB table.
+    """
+    if fmt == DIRECT_FORMAT:
+        from load_duckdb import create_raw_table
+        create_raw_table(con, table)
+        return
+    csv_path = output_path(output_dir, table, 'csv')
+    if os.path.exists(csv_path):
+        os.remove(csv_path)
+    shutil.rmtree(os.path.join(output_dir, table), ignore_errors=True)
+
+
+def open_chunk_writer(output_dir, table, fmt, part=None, con=None):
+    if fmt == DIRECT_FORMAT:
+        return DuckDBChunkWriter(con, table)
+    path = output_path(output_dir, table, fmt, part)
+    if fmt == 'parquet':
+        return ParquetChunkWriter(path, table)
+    return CsvChunkWriter(path, table)
+
+
+def write_table(df, output_dir, table, fmt, con=None):
+    """Writes a small, fully materialized table in the requested format."""
+    reset_output(output_dir, table, fmt, con=con)
+    with open_chunk_writer(output_dir, table, fmt, con=con) as out:
+        out.write(df)
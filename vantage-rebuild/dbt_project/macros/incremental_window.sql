@@ -0,0 +1,30 @@
+
+-- incremental_window.sql
+-- Lower bound (inclusive) of the days an incremental fct_transactions build
+-- has to (re)process: the latest loaded day minus a lookback for late-arriving
+-- rows. Returns none on full builds (first run or --full-refresh), in which
+-- case the models below apply no date filter at all.
+-- The intermediates are ephemeral, so they cannot use is_incremental()
+-- themselves; they all call this macro instead.
+{% macro transactions_window_start() %}
+    {%- if not execute or flags.FULL_REFRESH -%}
+        {{ return(none) }}
+    {%- endif -%}
+
+    {%- set existing = adapter.get_relation(
+        database=target.database,
+        schema=target.schema,
+        identifier='fct_transactions'
+    ) -%}
+    {%- if existing is none -%}
+        {{ return(none) }}
+    {%- endif -%}
+
+    {%- set max_date = run_query("select max(date_key) from " ~ existing).columns[0].values()[0] -%}
+    {%- if max_date is none -%}
+        {{ return(none) }}
+    {%- endif -%}
+
+    {%- set window_start = max_date - modules.datetime.timedelta(days=var('incremental_lookback_days')) -%}
+    {{ return("cast('" ~ window_start ~ "' as date)") }}
+{% endmacro %}
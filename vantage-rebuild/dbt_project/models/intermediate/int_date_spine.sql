@@ -0,0 +1,36 @@
+-- Shared date spine for dim_calendar and fct_budget_daily: one row per day
+-- over whatever span the data covers (orders and whole budget months), or
+-- over the date_spine_start / date_spine_end vars when they are set.
+-- Built set-based with generate_series (no recursive CTE), with the month
+-- keys precomputed so monthly data joins on a single equi-join key.
+
+with bounds as (
+    select
+        {% if var('date_spine_start', none) %}
+        cast('{{ var("date_spine_start") }}' as date) as start_day,
+        {% else %}
+        least(
+            (select min(order_date) from {{ ref('stg_orders') }}),
+            (select min(budget_month) from {{ ref('stg_budget') }})
+        ) as start_day,
+        {% endif %}
+        {% if var('date_spine_end', none) %}
+        cast('{{ var("date_spine_end") }}' as date) as end_day
+        {% else %}
+        greatest(
+            (select max(order_date) from {{ ref('stg_orders') }}),
+            (select last_day(max(budget_month)) from {{ ref('stg_budget') }})
+        ) as end_day
+        {% endif %}
+),
+
+days as (
+    select cast(unnest(generate_series(start_day, end_day, interval 1 day)) as date) as date_day
+    from bounds
+)
+
+select
+    date_day,
+    cast(date_trunc('month', date_day) as date) as month_start,
+    extract(day from last_day(date_day)) as days_in_month
+from days
@@ -1,10 +1,33 @@
+-- depends_on: {{ ref('stg_orders') }}
+{% set window_start = transactions_window_start() %}
 
 with orders_std as (
+    -- Already restricted to the incremental window, if any
     select * from {{ ref('int_orders_standardized') }}
 ),
 
+{% if window_start %}
+-- Each shop's last selling day before the window. Spend after it rolls forward
+-- into the window (see 3.), so it has to be read even though it predates window_start.
+last_selling_day as (
+    select
+        shop_id,
+        max(order_date) as order_date
+    from {{ ref('stg_orders') }}
+    where order_date < {{ window_start }}
+    group by 1
+),
+{% endif %}
+
 marketing_daily as (
-    select * from {{ ref('stg_marketing') }}
+    select m.* from {{ ref('stg_marketing') }} m
+    {% if window_start %}
+    -- Allocation ratios are recomputed for every (day, shop) in the window
+    left join last_selling_day lsd
+        on m.shop_id = lsd.shop_id
+    -- No selling day before the window: all of the shop's spend ends up in it
+    where lsd.order_date is null or m.date_day > lsd.order_date
+    {% endif %}
 ),
 
 -- 1. Daily Sales Summary (Dominator for allocation)
@@ -31,7 +54,23 @@ daily_spend as (
     from marketing_daily
 ),
 
--- 3. Allocation Factor
+-- 3. Attribution Day
+-- A shop can have zero orders on a low-volume day (e.g. the Christmas slump).
+-- That spend would never reach a line item, so it rolls forward to the shop's
+-- next selling day (ASOF join = nearest order_date on or after the spend date).
+spend_attributed as (
+    select
+        ds.order_date,
+        sp.shop_id,
+        sum(sp.marketing_spend_local) as marketing_spend_local
+    from daily_spend sp
+    asof inner join daily_sales ds
+        on sp.shop_id = ds.shop_id
+        and sp.date_day <= ds.order_date
+    group by 1, 2
+),
+
+-- 4. Allocation Factor
 allocation_factors as (
     select
         ds.order_date,
@@ -45,12 +84,12 @@ allocation_factors as (
             else 0 
         end as cost_per_eur_revenue
     from daily_sales ds
-    inner join daily_spend msp 
-        on ds.order_date = msp.date_day 
+    inner join spend_attributed msp 
+        on ds.order_date = msp.order_date 
         and ds.shop_id = msp.shop_id
 ),
 
--- 4. Apply to Lines
+-- 5. Apply to Lines
 final_allocation as (
     select
         ord.line_item_id,
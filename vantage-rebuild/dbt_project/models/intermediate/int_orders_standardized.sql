@@ -1,10 +1,18 @@
+{% set window_start = transactions_window_start() %}
 
 with orders as (
     select * from {{ ref('stg_orders') }}
+    {% if window_start %}
+    -- Incremental build: only the days fct_transactions has to (re)process
+    where order_date >= {{ window_start }}
+    {% endif %}
 ),
 
 line_items as (
     select * from {{ ref('stg_line_items') }}
+    {% if window_start %}
+    where order_id in (select order_id from orders)
+    {% endif %}
 ),
 
 rates as (
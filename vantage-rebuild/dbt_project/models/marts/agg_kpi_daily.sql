@@ -0,0 +1,54 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key='date_key'
+    )
+}}
+
+-- KPI rollup at (day, shop, product) grain, the base for agg_kpi_monthly.
+-- Incremental like fct_transactions: only the days from the latest rolled-up
+-- day minus the lookback are recomputed (and replaced via delete+insert).
+
+with transactions as (
+    select * from {{ ref('fct_transactions') }}
+    {% if is_incremental() %}
+    where date_key >= (select max(date_key) from {{ this }}) - {{ var('incremental_lookback_days') }}
+    {% endif %}
+),
+
+-- Mergeable distinct orders: every order is counted on exactly one row (the
+-- one holding its first line item). An order never spans days or shops, so
+-- sum(orders) is the exact distinct order count at any coarser grain.
+first_lines as (
+    select min(line_item_id) as line_item_id
+    from transactions
+    group by order_id
+),
+
+final as (
+    select
+        t.date_key,
+        t.shop_key,
+        t.product_key,
+
+        count(f.line_item_id) as orders,
+        -- Orders containing the product (only valid per product, do not sum across products)
+        count(distinct t.order_id) as orders_with_product,
+        count(*) as line_items,
+        sum(t.quantity) as quantity,
+
+        sum(t.gross_revenue_eur) as gross_revenue_eur,
+        sum(t.cogs_eur) as cogs_eur,
+        sum(t.logistics_allocated_eur) as logistics_allocated_eur,
+        sum(t.marketing_cost_allocated_eur) as marketing_cost_allocated_eur,
+        sum(t.contribution_margin_eur) as contribution_margin_eur,
+        sum(case when t.is_returned then t.gross_revenue_eur else 0 end) as returned_revenue_eur
+
+    from transactions t
+    left join first_lines f
+        on t.line_item_id = f.line_item_id
+    group by 1, 2, 3
+)
+
+select * from final
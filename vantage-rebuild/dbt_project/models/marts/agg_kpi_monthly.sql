@@ -0,0 +1,44 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key='month_key'
+    )
+}}
+
+-- KPI rollup at (month, shop) grain, built from agg_kpi_daily only (never
+-- from fct_transactions), so reading it costs rows per month, not per line item.
+-- Incremental: the months touched by the daily rollup's lookback window are
+-- recomputed from the daily rows.
+
+with daily as (
+    select * from {{ ref('agg_kpi_daily') }}
+    {% if is_incremental() %}
+    where date_key >= date_trunc('month', (select max(last_date_key) from {{ this }}) - {{ var('incremental_lookback_days') }})
+    {% endif %}
+),
+
+final as (
+    select
+        cast(date_trunc('month', date_key) as date) as month_key,
+        extract(year from date_key) as year,
+        extract(month from date_key) as month,
+        shop_key,
+        -- Latest day in the month so far (partial months while days are landing)
+        max(date_key) as last_date_key,
+
+        sum(orders) as total_orders,
+        sum(line_items) as line_items,
+        sum(quantity) as quantity,
+        sum(gross_revenue_eur) as gross_revenue,
+        sum(cogs_eur) as cogs,
+        sum(logistics_allocated_eur) as logistics_cost,
+        sum(marketing_cost_allocated_eur) as marketing_spend,
+        sum(contribution_margin_eur) as contribution_margin,
+        sum(returned_revenue_eur) as returned_revenue
+
+    from daily
+    group by 1, 2, 3, 4
+)
+
+select * from final
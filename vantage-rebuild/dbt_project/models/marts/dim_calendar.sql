@@ -1,10 +1,6 @@
 
-with recursive date_series as (
-    select cast('2024-01-01' as date) as date_day
-    union all
-    select date_day + interval 1 day
-    from date_series
-    where date_day < '2024-12-31'
+with date_series as (
+    select * from {{ ref('int_date_spine') }}
 ),
 
 final as (
@@ -15,7 +11,8 @@ final as (
         monthname(date_day) as month_name,
         week(date_day) as iso_week,
         dayofweek(date_day) as day_of_week_num, -- 0=Sun in some DBs, DuckDB: 0=Sun? No, DuckDB ISODOW is 1=Mon. dayofweek 0=Sun.
-        case when dayofweek(date_day) in (0, 6) then true else false end as is_weekend
+        case when dayofweek(date_day) in (0, 6) then true else false end as is_weekend,
+        month_start
     from date_series
 )
 
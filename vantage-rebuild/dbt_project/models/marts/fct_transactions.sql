@@ -1,3 +1,14 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key='date_key'
+    )
+}}
+
+-- Incremental on date_key: the intermediates only produce the days from
+-- transactions_window_start() on (new days plus a lookback for late-arriving
+-- rows), and delete+insert replaces exactly those days in the table.
 
 with orders_allocated as (
     select * from {{ ref('int_marketing_allocated') }}
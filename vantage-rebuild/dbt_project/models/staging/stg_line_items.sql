@@ -5,8 +5,9 @@ with source as (
 
 renamed as (
     select
-        line_id as line_item_id,
-        order_id,
+        -- Integer surrogate keys, joined to stg_orders on order_id
+        cast(line_id as bigint) as line_item_id,
+        cast(order_id as bigint) as order_id,
         sku_id,
         qty as quantity,
         unit_price_paid as unit_price_local,
@@ -5,8 +5,9 @@ with source as (
 
 renamed as (
     select
-        order_id,
-        customer_id,
+        -- Integer surrogate keys (unique per generator shard)
+        cast(order_id as bigint) as order_id,
+        cast(customer_id as bigint) as customer_id,
         shop_id,
         -- Correct datatypes
         cast(order_date as date) as order_date,
@@ -0,0 +1,28 @@
+-- assert_kpi_rollups_reconcile.sql
+-- The monthly rollup must match the fact table it was rolled up from:
+-- exact distinct orders per month/shop, revenue within rounding.
+with fact as (
+    select
+        cast(date_trunc('month', date_key) as date) as month_key,
+        shop_key,
+        count(distinct order_id) as total_orders,
+        sum(gross_revenue_eur) as gross_revenue,
+        sum(contribution_margin_eur) as contribution_margin
+    from {{ ref('fct_transactions') }}
+    group by 1, 2
+),
+
+rollup as (
+    select * from {{ ref('agg_kpi_monthly') }}
+)
+
+select *
+from fact
+full outer join rollup r
+    on fact.month_key = r.month_key
+    and fact.shop_key = r.shop_key
+where fact.total_orders is distinct from r.total_orders
+   or abs(fact.gross_revenue - r.gross_revenue) > 0.01
+   or abs(fact.contribution_margin - r.contribution_margin) > 0.01
+   or fact.month_key is null
+   or r.month_key is null
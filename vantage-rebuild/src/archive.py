@@ -0,0 +1,349 @@
+import os
+import shutil
+import struct
+import tarfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Copy buffer for raw member transfers
+COPY_BUFFER = 1 << 20
+
+# Large files are compressed in independent blocks of this size, so a single
+# multi-GB CSV spreads over all workers (same scheme as pigz / zstdmt)
+BLOCK_SIZE = 16 << 20
+
+ARCHIVE_FORMATS = ['zip', 'tar.zst']
+
+# Per-file zip policy: Parquet is compressed internally already, deflating it
+# again costs CPU for next to no size gain
+COMPRESSION_POLICY = {
+    '.parquet': zipfile.ZIP_STORED,
+    '.csv': zipfile.ZIP_DEFLATED
+}
+
+DEFLATE_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def compression_for(file_path):
+    return COMPRESSION_POLICY.get(os.path.splitext(file_path)[1], zipfile.ZIP_DEFLATED)
+
+
+def _gf2_times(mat, vec):
+    total, i = 0, 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+
+def _gf2_square(mat):
+    return [_gf2_times(mat, mat[n]) for n in range(32)]
+
+
+def crc32_combine(crc1, crc2, len2):
+    """CRC-32 of A+B from crc(A), crc(B) and len(B) (port of zlib's crc32_combine)."""
+    if len2 == 0:
+        return crc1
+    odd = [0xEDB88320] + [1 << n for n in range(31)]
+    even = _gf2_square(odd)
+    odd = _gf2_square(even)
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
+
+
+def _deflate_block(path, offset, length, last, level):
+    """
+    Raw-deflates one block of a file. Non-final blocks end on a sync flush
+    (byte aligned, not marked final), so the blocks of a file can simply be
+    concatenated into one valid deflate stream.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    out = comp.compress(data) + comp.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return out, zlib.crc32(data), len(data)
+
+
+def _zstd_block(data, level):
+    import pyarrow as pa
+
+    # Every block is a complete zstd frame; concatenated frames are a valid .zst
+    return pa.Codec('zstd', compression_level=level).compress(data, asbytes=True)
+
+
+def _ordered_results(pool, func, tasks, window):
+    """
+    Runs tasks on the pool (or inline without one) and yields the results in
+    task order, keeping at most `window` tasks in flight to bound memory.
+    """
+    tasks = iter(tasks)
+    if pool is None:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(func, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _file_blocks(path, level):
+    size = os.path.getsize(path)
+    offsets = range(0, size, BLOCK_SIZE) if size else [0]
+    for offset in offsets:
+        yield path, offset, BLOCK_SIZE, offset + BLOCK_SIZE >= size, level
+
+
+# Local file header layout from the zip spec (APPNOTE 4.3.7): name and extra
+# field lengths are the last two fields, the data follows right after them
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+
+# Attributes of an open ZipFile that _append_member relies on. They are not
+# public API, but have been stable in CPython 3.8 through 3.13 (CI runs
+# 3.10-3.13, including tests/test_archive.py); where any is missing,
+# update_archive falls back to ZipFile.write
+_ZIPFILE_INTERNALS = ('fp', 'filelist', 'NameToInfo', 'start_dir', '_didModify')
+
+
+def raw_members_supported(zout):
+    """Whether members can be appended to the open ZipFile `zout` without ZipFile.write."""
+    return hasattr(zipfile.ZipInfo, 'FileHeader') and all(hasattr(zout, a) for a in _ZIPFILE_INTERNALS)
+
+
+def _append_member(zout, zinfo, zip64, write_data):
+    """
+    The one place that writes into a ZipFile behind its back: writes the local
+    header of `zinfo` at the end of the archive, lets write_data(fp) append
+    the compressed bytes (it may update zinfo's CRC and sizes), rewrites the
+    header with the final values and registers the member for the central
+    directory, the same steps ZipFile.write() takes internally.
+    """
+    zinfo.header_offset = zout.fp.tell()
+    zout.fp.write(zinfo.FileHeader(zip64))
+    write_data(zout.fp)
+
+    end = zout.fp.tell()
+    zout.fp.seek(zinfo.header_offset)
+    zout.fp.write(zinfo.FileHeader(zip64))
+    zout.fp.seek(end)
+
+    zout.filelist.append(zinfo)
+    zout.NameToInfo[zinfo.filename] = zinfo
+    zout.start_dir = end
+    zout._didModify = True
+
+
+def _raw_data_offset(f, info):
+    # Compressed data starts after the member's local header (name + extra vary per member)
+    f.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    return info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+
+
+def _copy_bytes(src, dst, length):
+    while length > 0:
+        block = src.read(min(COPY_BUFFER, length))
+        if not block:
+            raise EOFError("Truncated zip member")
+        dst.write(block)
+        length -= len(block)
+
+
+def write_raw_member(zout, info, src, length):
+    """
+    Appends an already compressed member to an open (write-mode) ZipFile:
+    writes a local header from `info` (CRC and sizes must be set) and then
+    `length` bytes of compressed data from the file object `src`.
+    """
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    zinfo.external_attr = info.external_attr
+    # No trailing data descriptor: sizes and CRC are known up front
+    zinfo.flag_bits = info.flag_bits & ~0x08
+
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    _append_member(zout, zinfo, zip64, lambda fp: _copy_bytes(src, fp, length))
+
+
+def write_deflated_member(zout, file_path, arcname, blocks):
+    """
+    Streams a member made of pre-deflated blocks (data, crc, raw_length) into
+    an open ZipFile. CRC and sizes are only known at the end, so the local
+    header is patched afterwards, like ZipFile.write() does.
+    """
+    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = 0
+    zinfo.compress_size = 0
+    zinfo.file_size = 0
+
+    def write_blocks(fp):
+        for data, crc, length in blocks:
+            fp.write(data)
+            zinfo.CRC = crc32_combine(zinfo.CRC, crc, length)
+            zinfo.compress_size += len(data)
+            zinfo.file_size += length
+
+    # Same zip64 heuristic as zipfile itself
+    zip64 = os.path.getsize(file_path) * 1.05 > zipfile.ZIP64_LIMIT
+    _append_member(zout, zinfo, zip64, write_blocks)
+
+
+def update_archive(zip_filename, files, base_dir, unchanged=(), workers=None, level=DEFLATE_LEVEL):
+    """
+    (Re)builds `zip_filename` from `files` (archive names relative to base_dir).
+    Members are stored or deflated according to COMPRESSION_POLICY; deflation
+    runs block-wise on a process pool. Files listed in `unchanged` (the
+    caller knows they were not rewritten since the previous archive) are
+    copied over from it as raw compressed bytes. Returns (compressed, reused)
+    member counts.
+    """
+    previous = {}
+    old_zip = None
+    if os.path.exists(zip_filename):
+        try:
+            with zipfile.ZipFile(zip_filename, 'r') as zin:
+                previous = {info.filename: info for info in zin.infolist()}
+            # Reused members are read as raw bytes from the file itself
+            old_zip = open(zip_filename, 'rb')
+        except zipfile.BadZipFile:
+            previous = {}
+
+    workers = workers or os.cpu_count() or 1
+    unchanged = set(unchanged)
+    tmp_filename = zip_filename + '.tmp'
+    compressed, reused = 0, 0
+    pool = None
+    try:
+        with zipfile.ZipFile(tmp_filename, 'w') as zout:
+            # Reuse and block-parallel deflate need the zipfile internals (see _append_member)
+            raw = raw_members_supported(zout)
+            todo = []
+            for file_path in files:
+                arcname = os.path.relpath(file_path, base_dir)
+                info = previous.get(arcname) if raw and file_path in unchanged else None
+                if info is not None and info.compress_type == compression_for(file_path):
+                    todo.append((file_path, arcname, info))
+                else:
+                    todo.append((file_path, arcname, None))
+
+            # One ordered stream of deflate blocks for all files that need it, so
+            # small CSVs are compressed side by side and big ones block-parallel
+            deflate_tasks = (
+                block
+                for file_path, _, info in todo
+                if raw and info is None and compression_for(file_path) == zipfile.ZIP_DEFLATED
+                for block in _file_blocks(file_path, level)
+            )
+            pool = ProcessPoolExecutor(max_workers=workers) if raw and workers > 1 else None
+            results = _ordered_results(pool, _deflate_block, deflate_tasks, window=2 * workers)
+
+            for file_path, arcname, info in todo:
+                if info is not None:
+                    old_zip.seek(_raw_data_offset(old_zip, info))
+                    write_raw_member(zout, info, old_zip, info.compress_size)
+                    reused += 1
+                    continue
+
+                print(f"Adding {arcname} to archive...")
+                if raw and compression_for(file_path) == zipfile.ZIP_DEFLATED:
+                    n_blocks = len(list(_file_blocks(file_path, level)))
+                    write_deflated_member(zout, file_path, arcname, (next(results) for _ in range(n_blocks)))
+                else:
+                    zout.write(file_path, arcname, compress_type=compression_for(file_path), compresslevel=level)
+                compressed += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if old_zip is not None:
+            old_zip.close()
+
+    shutil.move(tmp_filename, zip_filename)
+    return compressed, reused
+
+
+class ZstdBlockWriter:
+    """
+    Write-only file object that compresses everything written to it as a
+    sequence of independent zstd frames (BLOCK_SIZE input each), compressed
+    in parallel on a process pool and written out in order.
+    """
+    def __init__(self, path, workers, level=ZSTD_LEVEL):
+        self.f = open(path, 'wb')
+        self.level = level
+        self.window = 2 * workers
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.buffer = bytearray()
+        self.pending = deque()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BLOCK_SIZE:
+            self._submit(bytes(self.buffer[:BLOCK_SIZE]))
+            del self.buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def _submit(self, block):
+        if self.pool is None:
+            self.f.write(_zstd_block(block, self.level))
+            return
+        self.pending.append(self.pool.submit(_zstd_block, block, self.level))
+        while len(self.pending) >= self.window:
+            self.f.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+            self.buffer.clear()
+        while self.pending:
+            self.f.write(self.pending.popleft().result())
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.f.close()
+
+
+def write_tar_zst(archive_filename, files, base_dir, workers=None, level=ZSTD_LEVEL):
+    """
+    Writes `files` into a zstd-compressed tarball (readable by `tar --zstd`
+    and `zstd -d`). The tar stream is compressed block-parallel; returns the
+    member count.
+    """
+    workers = workers or os.cpu_count() or 1
+    tmp_filename = archive_filename + '.tmp'
+    writer = ZstdBlockWriter(tmp_filename, workers, level)
+    try:
+        with tarfile.open(fileobj=writer, mode='w|') as tar:
+            for file_path in files:
+                arcname = os.path.relpath(file_path, base_dir)
+                print(f"Adding {arcname} to archive...")
+                tar.add(file_path, arcname)
+    finally:
+        writer.close()
+
+    shutil.move(tmp_filename, archive_filename)
+    return len(files)
@@ -1,13 +1,257 @@
-import duckdb
 import os
-import zipfile
-import glob
+import sys
+
+if __name__ == "__main__":
+    # Run as a script: put the shared modules in data_generation/src on the path
+    # (vantage.py does this for its subcommands, so importing the module never pays for it)
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+
+import duckdb
+import argparse
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import instrumentation
+from load_duckdb import sql_string
+from archive import ARCHIVE_FORMATS, update_archive, write_tar_zst
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Marts exported for Power BI
+TABLES = [
+    'dim_calendar',
+    'dim_products',
+    'fct_budget_daily',
+    'fct_transactions',
+    'agg_kpi_monthly'
+]
+
+EXPORT_FORMATS = ['parquet', 'csv']
+
+# Part of every export fingerprint: bump it when the writers change the
+# files produced for the same data, so earlier exports are not skipped
+WRITER_VERSION = 2
+
+# Parquet defaults (same as DuckDB's own COPY defaults)
+PARQUET_COMPRESSION = 'snappy'
+ROW_GROUP_SIZE = 122_880
+
+# Remembers what was exported last time (content fingerprint + files per export)
+MANIFEST_FILE = 'export_manifest.json'
+
+# Hive-style partitioning for large tables when exporting with partitioned=True
+# (partition key -> SQL expression). Power BI refreshes can then pick single
+# month/shop folders instead of reading the whole fact table.
+PARTITIONS = {
+    'fct_transactions': {
+        'month': "strftime(date_key, '%Y-%m')",
+        'shop_key': 'shop_key'
+    }
+}
+
+
+class ParquetSink:
+    def __init__(self, path, schema, compression, row_group_size):
+        self.writer = pq.ParquetWriter(path, schema, compression=compression)
+        self.row_group_size = row_group_size
+        self.paths = [path]
+
+    def write(self, batch):
+        self.writer.write_batch(batch, row_group_size=self.row_group_size)
+
+    def close(self):
+        self.writer.close()
+
+
+class PartitionedParquetSink:
+    """
+    Splits every batch by its partition keys and appends the slices to one
+    Parquet file per partition (<table>/<key>=<value>/.../part-0.parquet).
+    Derived keys (not columns of the table) only appear in the path.
+    """
+    def __init__(self, table_dir, schema, keys, derived, compression, row_group_size):
+        self.table_dir = table_dir
+        self.keys = keys
+        self.derived = derived
+        self.file_schema = pa.schema([f for f in schema if f.name not in derived])
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.writers = {}
+        # Partitions from an older export must not linger next to the new ones
+        shutil.rmtree(table_dir, ignore_errors=True)
+
+    def write(self, batch):
+        table = pa.Table.from_batches([batch])
+        for values in table.group_by(self.keys).aggregate([]).to_pylist():
+            mask = None
+            for key in self.keys:
+                cond = pc.equal(table[key], values[key])
+                mask = cond if mask is None else pc.and_(mask, cond)
+            part = table.filter(mask).drop_columns(self.derived)
+
+            path_values = tuple(values[key] for key in self.keys)
+            if path_values not in self.writers:
+                part_dir = os.path.join(
+                    self.table_dir, *[f"{key}={values[key]}" for key in self.keys]
+                )
+                os.makedirs(part_dir, exist_ok=True)
+                self.writers[path_values] = pq.ParquetWriter(
+                    os.path.join(part_dir, 'part-0.parquet'), self.file_schema, compression=self.compression
+                )
+            self.writers[path_values].write_table(part, row_group_size=self.row_group_size)
+
+    @property
+    def paths(self):
+        return [writer.where for writer in self.writers.values()]
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+
+class CsvSink:
+    """
+    CSV through DuckDB's own writer, so the file is byte-identical to
+    COPY ... (HEADER): cells quoted only where needed, DuckDB's number
+    formatting (pyarrow's writer quotes every string and prints 4.0 as 4).
+    Each batch is copied to a scratch file that is appended to the CSV.
+    """
+    def __init__(self, path, schema):
+        self.schema = schema
+        self.paths = [path]
+        self.con = duckdb.connect()
+        self._scratch = f"{path}.batch"
+        self._file = open(path, 'wb')
+        self._header = True
+
+    def write(self, batch):
+        self.con.register('_batch', pa.Table.from_batches([batch], schema=self.schema))
+        try:
+            self.con.execute(
+                f"COPY _batch TO {sql_string(self._scratch)} (FORMAT csv, HEADER {self._header}, DELIMITER ',')"
+            )
+        finally:
+            self.con.unregister('_batch')
+        with open(self._scratch, 'rb') as part:
+            shutil.copyfileobj(part, self._file)
+        self._header = False
+
+    def close(self):
+        if self._header:
+            # No rows at all: still write the header line
+            self.write(pa.RecordBatch.from_pylist([], schema=self.schema))
+        self._file.close()
+        self.con.close()
+        if os.path.exists(self._scratch):
+            os.remove(self._scratch)
+
+
+def remove_stale_outputs(export_dir, name, formats, partition):
+    """
+    Deletes the files of `name` that this export will not rewrite: the other
+    layout (flat Parquet vs partition folder) and formats no longer requested,
+    so nothing from an older export lingers in the folder.
+    """
+    stale = [f"{name}.{fmt}" for fmt in EXPORT_FORMATS if fmt not in formats]
+    if partition and 'parquet' in formats:
+        stale.append(f"{name}.parquet")
+    for file_name in stale:
+        path = os.path.join(export_dir, file_name)
+        if os.path.exists(path):
+            os.remove(path)
+    if name in PARTITIONS and not (partition and 'parquet' in formats):
+        shutil.rmtree(os.path.join(export_dir, name), ignore_errors=True)
+
+
+def export_query(con, name, query, export_dir, formats, compression, row_group_size, partitioned):
+    """
+    Evaluates `query` once on its own cursor and streams the record batches
+    into every requested output (Parquet, partitioned Parquet, CSV).
+    Returns the number of rows exported and the files written.
+    """
+    partition = PARTITIONS.get(name) if partitioned else None
+    derived = []
+    if partition:
+        derived = [key for key, expr in partition.items() if expr != key]
+        query = f"SELECT *, {', '.join(f'{partition[key]} AS {key}' for key in derived)} FROM ({query})"
+
+    remove_stale_outputs(export_dir, name, formats, partition)
+
+    cur = con.cursor()
+    try:
+        reader = cur.execute(query).fetch_record_batch(row_group_size)
+        # Columns of the table itself (derived partition keys only live in paths)
+        columns = [f.name for f in reader.schema if f.name not in derived]
+        schema = pa.schema([reader.schema.field(c) for c in columns])
+
+        sinks = []
+        if 'parquet' in formats and partition:
+            partition_sink = PartitionedParquetSink(
+                os.path.join(export_dir, name), reader.schema, list(partition), derived, compression, row_group_size
+            )
+        else:
+            partition_sink = None
+            if 'parquet' in formats:
+                sinks.append(ParquetSink(os.path.join(export_dir, f"{name}.parquet"), schema, compression, row_group_size))
+        if 'csv' in formats:
+            sinks.append(CsvSink(os.path.join(export_dir, f"{name}.csv"), schema))
+
+        rows = 0
+        for batch in reader:
+            with instrumentation.stage('export_batch', cat='chunk', table=name) as st:
+                if partition_sink is not None:
+                    partition_sink.write(batch)
+                if derived:
+                    batch = batch.select(columns)
+                for sink in sinks:
+                    sink.write(batch)
+                st.add(rows=batch.num_rows)
+            rows += batch.num_rows
+
+        if partition_sink is not None:
+            sinks.append(partition_sink)
+        for sink in sinks:
+            sink.close()
+        return rows, [path for sink in sinks for path in sink.paths]
+    finally:
+        cur.close()
+
+
+def fingerprint(con, query, options):
+    """
+    Cheap content fingerprint of a query result, computed inside DuckDB:
+    row count plus the sum of all row hashes, combined with the export
+    options (a different codec or layout has to be re-exported as well).
+    """
+    cur = con.cursor()
+    try:
+        rows, checksum = cur.execute(f"SELECT count(*), sum(hash(q))::VARCHAR FROM ({query}) q").fetchone()
+    finally:
+        cur.close()
+    return f"{rows}:{checksum}:{options}"
+
+
+def load_manifest(export_dir):
+    try:
+        with open(os.path.join(export_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_tables(formats=EXPORT_FORMATS, compression=PARQUET_COMPRESSION, row_group_size=ROW_GROUP_SIZE,
+                  partitioned=False, workers=None, force=False, archive='zip', archive_workers=None,
+                  db_path=None, export_dir=None):
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"unknown export format(s) {unknown}, choose from {', '.join(EXPORT_FORMATS)}")
 
-def export_tables():
     # Define paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    db_path = os.path.join(base_dir, 'data', 'vantage.duckdb')
-    export_dir = os.path.join(base_dir, 'data', 'export')
+    db_path = db_path or os.path.join(base_dir, 'data', 'vantage.duckdb')
+    export_dir = export_dir or os.path.join(base_dir, 'data', 'export')
 
     # Create export directory if it doesn't exist
     if not os.path.exists(export_dir):
@@ -18,63 +262,62 @@ def export_tables():
     print(f"Connecting to database at: {db_path}")
     con = duckdb.connect(db_path)
 
-    # Tables to export
-    tables = [
-        'dim_calendar',
-        'dim_products',
-        'fct_budget_daily',
-        'fct_transactions'
-    ]
-    
-    # 2. Export KPI Validation Query
+    # Queries to export: the KPI validation query plus every mart
+    exports = []
     kpi_sql_path = os.path.join(base_dir, 'analysis', 'kpi_validation.sql')
     if os.path.exists(kpi_sql_path):
         print(f"Found KPI Validation SQL at: {kpi_sql_path}")
-        try: 
-            with open(kpi_sql_path, 'r') as f:
-                kpi_query = f.read()
-            
-            output_file = os.path.join(export_dir, "kpi_validation.parquet")
-            print(f"Exporting KPI Validation to {output_file}...")
-            # Use subquery for COPY
-            con.execute(f"COPY ({kpi_query}) TO '{output_file}' (FORMAT 'parquet')")
-            print("Successfully exported KPI Validation (Parquet)")
-
-            output_file_csv = os.path.join(export_dir, "kpi_validation.csv")
-            print(f"Exporting KPI Validation to {output_file_csv}...")
-            con.execute(f"COPY ({kpi_query}) TO '{output_file_csv}' (HEADER, DELIMITER ',')")
-            print("Successfully exported KPI Validation (CSV)")
-            
-        except Exception as e:
-            print(f"Error exporting KPI Validation: {e}")
+        with open(kpi_sql_path, 'r') as f:
+            exports.append(('kpi_validation', f.read()))
     else:
         print(f"Warning: KPI Validation SQL not found at {kpi_sql_path}")
+    for table in TABLES:
+        exports.append((table, f"SELECT * FROM {table}"))
 
-    try:
-        for table in tables:
-            output_file = os.path.join(export_dir, f"{table}.parquet")
-            print(f"Exporting {table} to {output_file}...")
-            
-            # Check if table exists first (handling potential schema/naming differences)
-            # DBT usually creates tables in the main schema or a configured schema.
-            # We'll try to select from it directly.
-            try:
-                con.execute(f"COPY (SELECT * FROM {table}) TO '{output_file}' (FORMAT 'parquet')")
-                print(f"Successfully exported {table} (Parquet)")
-
-                # Export CSV
-                output_file_csv = os.path.join(export_dir, f"{table}.csv")
-                print(f"Exporting {table} to {output_file_csv}...")
-                con.execute(f"COPY (SELECT * FROM {table}) TO '{output_file_csv}' (HEADER, DELIMITER ',')")
-                print(f"Successfully exported {table} (CSV)")
-            except duckdb.CatalogException:
-                print(f"Table {table} not found. Checking available tables...")
-                # List tables to help debugging if one is missing
-                available_tables = con.execute("SHOW TABLES").fetchall()
-                print(f"Available tables: {[t[0] for t in available_tables]}")
-            except Exception as e:
-                 print(f"Error exporting {table}: {e}")
+    # Unchanged exports (same fingerprint, files still there) are skipped
+    manifest = load_manifest(export_dir)
+    skipped = set()
+
+    def run_export(name, query):
+        try:
+            layout = 'partitioned' if partitioned and name in PARTITIONS else 'single'
+            with instrumentation.stage('fingerprint', table=name):
+                fp = fingerprint(con, query, f"v{WRITER_VERSION}|{sorted(formats)}|{compression}|{row_group_size}|{layout}")
+            known = manifest.get(name, {})
+            if not force and known.get('fingerprint') == fp and all(
+                os.path.exists(os.path.join(export_dir, f)) for f in known.get('files', [])
+            ):
+                print(f"Skipping {name} (unchanged)")
+                skipped.add(name)
+                return
+
+            print(f"Exporting {name} ({', '.join(formats)})...")
+            with instrumentation.stage('export_table', table=name, formats=','.join(formats)) as st:
+                rows, files = export_query(
+                    con, name, query, export_dir, formats, compression, row_group_size, partitioned
+                )
+                st.add(rows=rows, bytes=sum(os.path.getsize(f) for f in files))
+            manifest[name] = {
+                'fingerprint': fp,
+                'rows': rows,
+                'files': [os.path.relpath(f, export_dir) for f in files]
+            }
+            print(f"Successfully exported {name} ({rows} rows)")
+        except duckdb.CatalogException:
+            manifest.pop(name, None)
+            print(f"Table {name} not found. Checking available tables...")
+            # List tables to help debugging if one is missing
+            available_tables = con.cursor().execute("SHOW TABLES").fetchall()
+            print(f"Available tables: {[t[0] for t in available_tables]}")
+        except Exception as e:
+            # Its files may be half written: neither listed nor archived
+            manifest.pop(name, None)
+            print(f"Error exporting {name}: {e}")
 
+    # Every export runs on its own cursor, concurrently
+    try:
+        with ThreadPoolExecutor(max_workers=workers or len(exports)) as pool:
+            list(pool.map(lambda item: run_export(*item), exports))
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
@@ -83,23 +326,84 @@ def export_tables():
             con.close()
         except:
             pass
-        
+
+    # The manifest lists exactly this run's exports (written now or unchanged)
+    manifest = {name: manifest[name] for name, _ in exports if name in manifest}
+    with open(os.path.join(export_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
     # Compression happens after DB work is done
     print("Export process completed. Compressing files...")
     try:
-        zip_filename = os.path.join(export_dir, 'bi_export.zip')
-        with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Compress both Parquet and CSV files
-            for file_path in glob.glob(os.path.join(export_dir, '*.parquet')) + glob.glob(os.path.join(export_dir, '*.csv')):
-                arcname = os.path.basename(file_path)
-                print(f"Adding {arcname} to archive...")
-                zipf.write(file_path, arcname)
-                
-        print(f"Successfully created archive: {zip_filename}")
+        archive_filename = os.path.join(export_dir, f'bi_export.{archive}')
+        # An archive in the other format now lags behind the manifest; a later
+        # run would otherwise reuse its members for skipped exports
+        for other in ARCHIVE_FORMATS:
+            stale = os.path.join(export_dir, f'bi_export.{other}')
+            if other != archive and os.path.exists(stale):
+                os.remove(stale)
+        # Members come from the manifest, not from a scan of the folder, so
+        # files of older exports are never bundled
+        files = sorted(os.path.join(export_dir, f) for entry in manifest.values() for f in entry['files'])
+        with instrumentation.stage('archive', format=archive) as st:
+            if archive == 'tar.zst':
+                members = write_tar_zst(archive_filename, files, export_dir, workers=archive_workers)
+                print(f"Successfully created archive: {archive_filename} ({members} files)")
+            else:
+                # Parquet is stored, CSV deflated in parallel; members of skipped
+                # exports are carried over from the previous archive as-is
+                unchanged = [os.path.join(export_dir, f) for name in skipped for f in manifest[name]['files']]
+                compressed, reused = update_archive(
+                    archive_filename, files, export_dir, unchanged=unchanged, workers=archive_workers
+                )
+                print(f"Successfully created archive: {archive_filename} ({compressed} compressed, {reused} reused)")
+            st.add(bytes=os.path.getsize(archive_filename))
     except Exception as e:
+        # An archive older than the manifest must not be reused by the next run
+        if os.path.exists(archive_filename):
+            os.remove(archive_filename)
         print(f"Error zipping files: {e}")
-        
+
     print("Export script finished.")
 
+
+def _formats(value):
+    formats = value.split(',')
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown format(s) {','.join(unknown)}, choose from {','.join(EXPORT_FORMATS)}")
+    return formats
+
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Export the marts for Power BI.")
+    parser.add_argument('--formats', type=_formats, default=EXPORT_FORMATS,
+                        help="Comma-separated output formats (default: parquet,csv)")
+    parser.add_argument('--compression', default=PARQUET_COMPRESSION,
+                        help=f"Parquet codec, e.g. snappy, zstd, gzip, none (default: {PARQUET_COMPRESSION})")
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE,
+                        help=f"Rows per Parquet row group (default: {ROW_GROUP_SIZE})")
+    parser.add_argument('--partitioned', action='store_true',
+                        help="Write fct_transactions as Parquet partitioned by month and shop")
+    parser.add_argument('--workers', type=int, default=None, help="Concurrent exports (default: one per table)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-export every table even if its content did not change")
+    parser.add_argument('--archive', choices=ARCHIVE_FORMATS, default='zip',
+                        help="Bundle format: zip (Parquet stored, CSV deflated) or tar.zst (default: zip)")
+    parser.add_argument('--archive-workers', type=int, default=None,
+                        help="Processes compressing the bundle (default: one per core)")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+    instrumentation.check_arguments(parser, args)
+    if args.trace:
+        instrumentation.enable(profile=args.profile)
+    export_tables(
+        formats=args.formats, compression=args.compression, row_group_size=args.row_group_size,
+        partitioned=args.partitioned, workers=args.workers, force=args.force,
+        archive=args.archive, archive_workers=args.archive_workers
+    )
+    if args.trace:
+        instrumentation.write(args.trace, args.trace_format)
+
 if __name__ == "__main__":
-    export_tables()
+    cli()
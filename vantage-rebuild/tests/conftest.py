@@ -0,0 +1,10 @@
+import os
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Same import path as vantage.py: the shared modules first, then the script directories
+for path in ('viz', 'src', 'data_generation/src'):
+    path = os.path.join(BASE_DIR, path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SHARED_DIR = os.path.join(BASE_DIR, 'data_generation', 'src')
+
+# Heavy third-party packages, imported only by the subcommands that need them
+HEAVY = ['faker', 'matplotlib', 'seaborn', 'duckdb', 'pandas', 'numpy', 'pyarrow']
+
+# Entry point -> (directory, module, packages importing it must not load)
+ENTRY_POINTS = {
+    'cli': ('.', 'vantage', HEAVY),
+    'generate': ('data_generation/src', 'main', ['faker', 'matplotlib', 'seaborn', 'duckdb']),
+    'load': ('data_generation/src', 'load_duckdb', HEAVY),
+    'scenarios': ('data_generation/src', 'scenarios', ['faker', 'matplotlib', 'seaborn', 'duckdb']),
+    'export': ('src', 'export_bi_tables', ['faker', 'matplotlib', 'seaborn']),
+    'plot': ('viz', 'generate_plots', ['faker', 'matplotlib', 'seaborn', 'duckdb']),
+}
+
+
+def imported_packages(directory, module):
+    """Top-level packages loaded by `import <module>` in a fresh interpreter (with vantage.py's path)."""
+    env = dict(os.environ, PYTHONPATH=SHARED_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        cwd=os.path.join(BASE_DIR, directory), env=env, capture_output=True, text=True, check=True
+    )
+    return {name.split('.')[0] for name in proc.stdout.split()}
+
+
+@pytest.mark.parametrize('entry_point', ENTRY_POINTS)
+def test_heavy_modules_load_lazily(entry_point):
+    directory, module, forbidden = ENTRY_POINTS[entry_point]
+    assert sorted(set(forbidden) & imported_packages(directory, module)) == []
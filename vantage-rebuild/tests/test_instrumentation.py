@@ -0,0 +1,70 @@
+import contextlib
+import io
+import os
+import pstats
+import time
+import timeit
+import pytest
+import instrumentation
+from main import main as generate, cli as generate_cli
+
+# Allowed share of a generation run spent in disabled hooks
+MAX_OVERHEAD = 0.01
+
+
+@instrumentation.profiled
+def _hot():
+    return None
+
+
+@pytest.fixture(autouse=True)
+def tracing_off():
+    instrumentation.disable()
+    yield
+    instrumentation.disable()
+
+
+def _generate(tmp_path, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate(output_dir=str(tmp_path / 'output'), db_path=str(tmp_path / 'vantage.duckdb'), **kwargs)
+
+
+def test_disabled_hooks_cost_next_to_nothing(tmp_path):
+    """Every event of a traced run stands for one disabled stage() plus one @profiled call."""
+    def hook():
+        with instrumentation.stage('chunk', cat='chunk', table='t') as st:
+            st.add(rows=1, bytes=1)
+        _hot()
+
+    number = 100_000
+    per_hook_s = min(timeit.repeat(hook, number=number, repeat=5)) / number
+
+    start = time.perf_counter()
+    _generate(tmp_path)
+    off_s = time.perf_counter() - start
+
+    instrumentation.enable()
+    _generate(tmp_path)
+    events = len(instrumentation.drain())
+
+    assert events > 0
+    assert events * per_hook_s / off_s <= MAX_OVERHEAD
+
+
+def test_profile_covers_the_shard_workers(tmp_path):
+    """The parent never generates orders itself, so these calls come from the workers."""
+    trace_path = str(tmp_path / 'trace.json')
+    instrumentation.enable(profile=True)
+    _generate(tmp_path, workers=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        instrumentation.write(trace_path)
+
+    stats = pstats.Stats(f"{trace_path}.prof").stats
+    calls = sum(calls for (_, _, func), (_, calls, *_) in stats.items() if func == 'generate_orders_batch')
+    assert calls > 0
+    assert os.path.exists(trace_path)
+
+
+def test_profile_needs_trace():
+    with pytest.raises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+        generate_cli(['--profile'])
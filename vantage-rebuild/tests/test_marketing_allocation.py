@@ -0,0 +1,110 @@
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+from datetime import date, timedelta
+import duckdb
+import pytest
+from main import main as generate
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DBT_DIR = os.path.join(BASE_DIR, 'dbt_project')
+
+sys.path.insert(0, os.path.join(BASE_DIR, 'benchmarks'))
+from bench_dbt_incremental import hold_out_last_day, land_last_day  # noqa: E402
+
+# Lookback of the incremental run, passed explicitly so the window edge is known
+LOOKBACK_DAYS = 3
+
+pytestmark = pytest.mark.skipif(shutil.which('dbt') is None, reason="dbt is not installed")
+
+
+def dbt(db, command, *args):
+    env = dict(os.environ, VANTAGE_DB_PATH=db['path'])
+    cmd = [
+        'dbt', command, '--profiles-dir', '.',
+        '--target-path', os.path.join(db['dir'], 'target'),
+        '--log-path', os.path.join(db['dir'], 'logs'),
+        *args
+    ]
+    proc = subprocess.run(cmd, cwd=DBT_DIR, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, f"dbt {command} failed:\n{proc.stdout[-2000:]}"
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A 1x dataset generated straight into a scratch DuckDB file, seeds loaded."""
+    db = {'dir': str(tmp_path), 'path': str(tmp_path / 'vantage.duckdb')}
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate(fmt='direct', output_dir=str(tmp_path / 'output'), db_path=db['path'])
+    dbt(db, 'seed')
+    return db
+
+
+def drop_shop_day(path, shop_id, day):
+    """Deletes one shop's orders (and their line items) on one day: a day with spend but no orders."""
+    con = duckdb.connect(path)
+    con.execute(
+        "DELETE FROM raw_line_items WHERE order_id IN "
+        "(SELECT order_id FROM raw_orders WHERE shop_id = ? AND order_date = ?)", [shop_id, day]
+    )
+    con.execute("DELETE FROM raw_orders WHERE shop_id = ? AND order_date = ?", [shop_id, day])
+    con.close()
+
+
+def assert_fully_allocated(db):
+    """
+    Every shop's allocated marketing cost matches its spend to the cent.
+    Spend after a shop's last selling day has nowhere to go and is left out.
+    """
+    dbt(db, 'test', '--select', 'assert_marketing_fully_allocated')
+    con = duckdb.connect(db['path'], read_only=True)
+    gaps = con.execute("""
+        SELECT m.shop_id, round(m.spend, 2), round(f.allocated, 2)
+        FROM (
+            SELECT shop_id, sum(spend_amount) AS spend
+            FROM raw_marketing_daily m
+            WHERE date <= (SELECT max(order_date) FROM raw_orders o WHERE o.shop_id = m.shop_id)
+            GROUP BY 1
+        ) m
+        LEFT JOIN (
+            SELECT shop_key AS shop_id, sum(marketing_cost_allocated_eur) AS allocated
+            FROM fct_transactions
+            GROUP BY 1
+        ) f USING (shop_id)
+        WHERE f.allocated IS NULL OR abs(m.spend - f.allocated) > 0.01
+        ORDER BY 1
+    """).fetchall()
+    con.close()
+    assert gaps == []
+
+
+def test_spend_on_zero_order_days_rolls_forward(db):
+    """Two consecutive zero-order days in one shop, full build."""
+    for day in (date(2024, 6, 12), date(2024, 6, 13)):
+        drop_shop_day(db['path'], 'CH', day)
+    dbt(db, 'run', '--select', '+fct_transactions', '--full-refresh')
+    assert_fully_allocated(db)
+
+
+def test_incremental_reads_spend_before_the_window(db):
+    """
+    A zero-order day right before the incremental window: its spend rolls
+    forward into the window, so the incremental run has to read it although
+    it predates the window.
+    """
+    con = duckdb.connect(db['path'])
+    last_day = hold_out_last_day(con)
+    con.close()
+    # History ends the day before last_day; the incremental window starts LOOKBACK_DAYS earlier
+    window_start = last_day - timedelta(days=1 + LOOKBACK_DAYS)
+    drop_shop_day(db['path'], 'CH', window_start - timedelta(days=1))
+    dbt(db, 'run', '--select', '+fct_transactions', '--full-refresh')
+
+    con = duckdb.connect(db['path'])
+    land_last_day(con)
+    con.close()
+    dbt(db, 'run', '--select', '+fct_transactions', '--vars', f'{{incremental_lookback_days: {LOOKBACK_DAYS}}}')
+    assert_fully_allocated(db)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from scipy import stats
+from samplers import AliasSampler
+
+# Below this p-value a sampler counts as not matching the reference distribution
+ALPHA = 0.001
+SEED = 42
+DRAWS = 500_000
+
+
+def pooled_chisquare(counts, expected, min_expected=5.0):
+    """Goodness-of-fit test; bins with tiny expected counts are pooled into one."""
+    order = np.argsort(expected)
+    counts, expected = counts[order], expected[order]
+    cut = np.searchsorted(np.cumsum(expected), min_expected)
+    if cut > 0:
+        counts = np.r_[counts[:cut + 1].sum(), counts[cut + 1:]]
+        expected = np.r_[expected[:cut + 1].sum(), expected[cut + 1:]]
+    return stats.chisquare(counts, expected).pvalue
+
+
+def two_sample(a, b, n_bins):
+    """Chi-square test that two samples of indices come from the same distribution."""
+    table = np.vstack([np.bincount(a, minlength=n_bins), np.bincount(b, minlength=n_bins)])
+    table = table[:, table.sum(axis=0) >= 10]
+    return stats.chi2_contingency(table)[1]
+
+
+def weights(name):
+    # Same weight shapes as the generators: Zipf customer activity, Pareto popularity
+    rng = np.random.default_rng(SEED)
+    return {
+        'customers': lambda: rng.zipf(a=2.0, size=5000).astype(np.float64),
+        'products': lambda: rng.pareto(a=2.5, size=500),
+        'basket sizes': lambda: np.array([0.50, 0.30, 0.15, 0.05]),
+    }[name]()
+
+
+@pytest.mark.parametrize('name', ['customers', 'products', 'basket sizes'])
+def test_sample_matches_weights(name):
+    rng = np.random.default_rng(SEED)
+    sampler = AliasSampler(weights(name))
+    alias = sampler.sample(rng, DRAWS)
+    legacy = np.random.RandomState(SEED).choice(sampler.n, size=DRAWS, p=sampler.probs)
+
+    assert pooled_chisquare(np.bincount(alias, minlength=sampler.n).astype(float), sampler.probs * DRAWS) >= ALPHA
+    assert two_sample(alias, legacy, sampler.n) >= ALPHA
+
+
+def test_sample_distinct_matches_choice_without_replacement():
+    """Position by position and per basket set, like np.random.choice(replace=False)."""
+    size, baskets = 3, 100_000
+    rng = np.random.default_rng(SEED)
+    legacy_rng = np.random.RandomState(SEED)
+    sampler = AliasSampler(np.random.default_rng(SEED).pareto(a=1.5, size=12) + 0.05)
+    n = sampler.n
+
+    fast = sampler.sample_distinct(rng, np.full(baskets, size))
+    legacy = np.array([legacy_rng.choice(n, size=size, replace=False, p=sampler.probs) for _ in range(baskets)])
+
+    assert ((fast[:, :, None] == fast[:, None, :]).sum(axis=(1, 2)) == size).all(), "repeated item in a basket"
+    for k in range(size):
+        assert two_sample(fast[:, k], legacy[:, k], n) >= ALPHA, f"position {k}"
+    # Unordered basket contents as one categorical code
+    codes = lambda picks: np.sort(picks, axis=1) @ (n ** np.arange(size))
+    _, inverse = np.unique(np.r_[codes(fast), codes(legacy)], return_inverse=True)
+    assert two_sample(inverse[:baskets], inverse[baskets:], inverse.max() + 1) >= ALPHA
+
+
+def test_zero_weights_never_drawn():
+    rng = np.random.default_rng(SEED)
+    sampler = AliasSampler([0.0, 3.0, 0.0, 1.0, 0.0])
+    drawn = np.r_[sampler.sample(rng, 100_000), sampler.sample_distinct(rng, np.full(1000, 2)).ravel()]
+    assert set(np.unique(drawn)) == {1, 3}
+
+
+def test_sample_distinct_rejects_more_items_than_have_weight():
+    sampler = AliasSampler([0.0, 3.0, 0.0, 1.0, 0.0])
+    with pytest.raises(ValueError):
+        sampler.sample_distinct(np.random.default_rng(SEED), [1, 3])
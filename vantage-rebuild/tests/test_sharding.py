@@ -0,0 +1,58 @@
+import contextlib
+import filecmp
+import io
+import os
+from datetime import date
+
+import numpy as np
+from main import SHOPS, main as generate
+from seasonality import SeasonalityEngine
+from sharding import SHARD_TABLES, plan_shards
+
+
+def _calendar():
+    return SeasonalityEngine(start_date=date(2024, 1, 1), days=365, cache_dir=None).get_daily_multipliers()
+
+
+def _expected_orders(shard):
+    return float((shard['shop']['base'] * shard['multipliers']).sum())
+
+
+def test_reference_volume_keeps_one_shard_per_shop_month():
+    shards = plan_shards(_calendar(), SHOPS, seed=42)
+    assert len(shards) == 12 * len(SHOPS)
+
+
+def test_busy_shop_months_split_into_balanced_day_ranges():
+    calendar_df = _calendar()
+    shops = [dict(shop, base=shop['base'] * 20) for shop in SHOPS]
+    shard_orders = 5_000
+    shards = plan_shards(calendar_df, shops, seed=42, shard_orders=shard_orders)
+    assert len(shards) > 100
+
+    # Every (shop, day) is covered exactly once
+    for shop in shops:
+        days = np.concatenate([s['dates'] for s in shards if s['shop'] is shop])
+        assert np.array_equal(days, calendar_df['date'].to_numpy().astype('datetime64[D]'))
+
+    # No shard exceeds the target by more than its busiest day
+    max_day = max(calendar_df['total_multiplier'].max() * shop['base'] for shop in shops)
+    expected = np.array([_expected_orders(s) for s in shards])
+    assert expected.max() <= shard_orders + max_day
+    # Split shop-months are cut into ranges of similar size
+    assert expected.max() / np.median(expected) < 2
+
+
+def test_split_output_does_not_depend_on_worker_count(tmp_path):
+    # A tiny target forces splits even at the reference volume
+    for workers in (1, 2):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(workers=workers, fmt='csv', output_dir=str(tmp_path / f'w{workers}'), days=31,
+                     num_products=50, num_customers=200, shard_orders=200)
+
+    for table in SHARD_TABLES:
+        parts = sorted(os.listdir(tmp_path / 'w1' / table))
+        assert len(parts) > len(SHOPS)
+        assert parts == sorted(os.listdir(tmp_path / 'w2' / table))
+        _, mismatch, errors = filecmp.cmpfiles(tmp_path / 'w1' / table, tmp_path / 'w2' / table, parts, shallow=False)
+        assert not mismatch and not errors
@@ -0,0 +1,55 @@
+"""
+Single entry point for the whole pipeline:
+
+    python vantage.py generate   [--workers 8 --format parquet ...]
+    python vantage.py load       [--format parquet --incremental ...]
+    python vantage.py export     [--formats parquet --archive tar.zst ...]
+    python vantage.py plot       [--db-path data/vantage.duckdb ...]
+    python vantage.py scenarios  [--scales 0.5,1,2 --black-week 2,3,4 ...]
+
+Every subcommand takes the flags of the script behind it (see
+`python vantage.py <command> --help`). The scripts still run on their own.
+Modules are imported only by the subcommand that needs them: `generate`
+never loads duckdb or matplotlib, and the CLI itself loads neither pandas nor numpy.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared modules (schemas, instrumentation, generators) every subcommand builds on
+SHARED_DIR = os.path.join(BASE_DIR, 'data_generation', 'src')
+
+# Subcommand -> (directory, module, help); the module's cli(argv, prog) does the work
+COMMANDS = {
+    'generate': ('data_generation/src', 'main', "Generate the raw datasets"),
+    'load': ('data_generation/src', 'load_duckdb', "Load the raw tables into DuckDB"),
+    'export': ('src', 'export_bi_tables', "Export the marts for Power BI"),
+    'plot': ('viz', 'generate_plots', "Render the documentation plots (or plots of the generated data)"),
+    'scenarios': ('data_generation/src', 'scenarios', "Run a grid of what-if scenarios"),
+}
+
+
+def run(command, argv):
+    directory, module, _ = COMMANDS[command]
+    for path in (SHARED_DIR, os.path.join(BASE_DIR, directory)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    importlib.import_module(module).cli(argv, prog=f"vantage.py {command}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='vantage.py', description="Vantage Alpin pipeline: generate, load, export, plot.",
+        epilog="\n".join(f"  {name:<10} {help_text}" for name, (_, _, help_text) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help="One of: " + ", ".join(COMMANDS))
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Options of the subcommand")
+    args = parser.parse_args(argv)
+    run(args.command, args.args)
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
-import sys
 import os
+import sys
 
-# Add data_generation/src to path so we can import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
+if __name__ == "__main__":
+    # Run as a script: put the shared modules in data_generation/src on the path
+    # (vantage.py does this for its subcommands, so importing the module never pays for it)
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_generation/src')))
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from seasonality import SeasonalityEngine
 from generators import ProductGenerator
 from datetime import date
 
+# Data mode: longest series drawn point by point (longer ones are min/max-decimated)
+MAX_POINTS = 2000
+# Data mode: price histogram bins (counted inside DuckDB)
+PRICE_BINS = 60
+
 def setup_style():
+    # matplotlib and seaborn load on first use: importing this module (vantage.py plot --help) stays cheap
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     sns.set_theme(style="whitegrid")
     plt.rcParams['font.family'] = 'sans-serif'
     plt.rcParams['axes.titlesize'] = 14
     plt.rcParams['axes.labelsize'] = 12
 
 def plot_seasonality(output_dir):
+    import matplotlib.pyplot as plt
+
     print("Generating Seasonality Plot...")
     engine = SeasonalityEngine(start_date=date(2024, 1, 1), days=365)
     df = engine.get_daily_multipliers()
@@ -33,13 +45,14 @@ def plot_seasonality(output_dir):
     # We can annotate or just let the visual speak. 
     # Use fill_between for events
     
+    # Event windows come from the engine's event calendar
+    masks = engine.event_masks()
+    
     # Black Week
-    mask_bf = (df['date'].dt.month == 11) & (df['date'].dt.day >= 20) & (df['date'].dt.day <= 27)
-    plt.fill_between(df['date'], 0, df['total_multiplier'], where=mask_bf, color='#e74c3c', alpha=0.3, label='Black Week')
+    plt.fill_between(df['date'], 0, df['total_multiplier'], where=masks['Black Week'], color='#e74c3c', alpha=0.3, label='Black Week')
     
     # Summer Sale
-    mask_summer = (df['date'].dt.month == 7) & (df['date'].dt.day >= 15) & (df['date'].dt.day <= 30)
-    plt.fill_between(df['date'], 0, df['total_multiplier'], where=mask_summer, color='#f1c40f', alpha=0.3, label='Summer Sale')
+    plt.fill_between(df['date'], 0, df['total_multiplier'], where=masks['Summer Sale'], color='#f1c40f', alpha=0.3, label='Summer Sale')
     
     plt.title('Non-Homogeneous Poisson Process: Seasonality Driver ($\\lambda_t$)', fontweight='bold')
     plt.ylabel('Demand Multiplier (Baseline = 1.0)')
@@ -50,6 +63,9 @@ def plot_seasonality(output_dir):
     plt.close()
 
 def plot_distributions(output_dir):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     print("Generating Product Distributions...")
     gen = ProductGenerator(num_products=1000) # Generate more for smoother plots
     df = gen.generate()
@@ -84,14 +100,199 @@ def plot_distributions(output_dir):
     plt.savefig(os.path.join(output_dir, 'pareto_affinity.png'), dpi=150)
     plt.close()
 
-def main():
-    output_dir = os.path.dirname(os.path.abspath(__file__))
+def downsample(x, y, max_points=MAX_POINTS):
+    """
+    Min/max decimation for long series: splits the series into max_points/2
+    buckets and keeps each bucket's lowest and highest point, so spikes
+    (Black Week) survive while the number of drawn points stays fixed.
+    """
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    buckets = max_points // 2
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    # Buckets beyond the end are all-NaN: drop them before the arg lookups
+    rows = rows[:-(-n // size)]
+    offsets = np.arange(len(rows)) * size
+    keep = np.unique(np.r_[0, n - 1, offsets + np.nanargmin(rows, axis=1), offsets + np.nanargmax(rows, axis=1)])
+    return x[keep], y[keep]
+
+
+def load_aggregates(con, tables, max_points=MAX_POINTS):
+    """
+    Data mode: everything the plots need, aggregated inside DuckDB, so only a
+    few thousand numbers leave the database whatever the data volume:
+    daily orders per shop, a binned price histogram per category and the
+    popularity curve sampled at log-spaced ranks.
+    `tables` maps raw table names to a FROM-able relation (table or read_* query).
+    """
+    daily = con.execute(f"""
+        SELECT order_date, shop_id, count(*) AS orders
+        FROM {tables['raw_orders']}
+        GROUP BY ALL
+        ORDER BY 1
+    """).df().pivot(index='order_date', columns='shop_id', values='orders').fillna(0)
+
+    low, high, n_products = con.execute(
+        f"SELECT min(avg_price_eur), max(avg_price_eur), count(*) FROM {tables['raw_products']}"
+    ).fetchone()
+    width = (high - low) / PRICE_BINS or 1.0
+    hist = con.execute(f"""
+        SELECT category, least(floor((avg_price_eur - ?) / ?), ? - 1)::INTEGER AS bin, count(*) AS products
+        FROM {tables['raw_products']}
+        GROUP BY ALL
+    """, [low, width, PRICE_BINS]).df()
+    counts = hist.pivot(index='bin', columns='category', values='products').reindex(range(PRICE_BINS)).fillna(0)
+    edges = low + width * np.arange(PRICE_BINS + 1)
+
+    # Popularity curve at log-spaced ranks (1 = bestseller): one sorted pass, only the sampled ranks come back
+    ranks = np.unique(np.geomspace(1, n_products, max_points).astype(np.int64))
+    pareto = con.execute(f"""
+        SELECT rank, popularity_score
+        FROM (
+            SELECT popularity_score, row_number() OVER (ORDER BY popularity_score DESC) AS rank
+            FROM {tables['raw_products']}
+        )
+        WHERE rank IN (SELECT unnest(?::BIGINT[]))
+        ORDER BY rank
+    """, [ranks.tolist()]).df()
+
+    return {
+        'daily': daily,
+        'price_hist': (edges, counts),
+        'pareto': (pareto['rank'].to_numpy(), pareto['popularity_score'].to_numpy())
+    }
+
+
+def render_daily_orders(daily, path, max_points=MAX_POINTS):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    dates = daily.index.to_numpy()
+    for shop in daily.columns:
+        x, y = downsample(dates, daily[shop].to_numpy(dtype=np.float64), max_points)
+        plt.plot(x, y, label=shop, linewidth=1.0)
+    plt.title('Daily Orders per Shop (Generated Data)', fontweight='bold')
+    plt.ylabel('Orders')
+    plt.xlabel('Date')
+    plt.legend(loc='upper left')
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    plt.close()
+
+
+def render_price_hist(edges, counts, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(10, 6))
+    # Pre-binned counts drawn as steps (no KDE over raw rows)
+    colors = sns.color_palette('viridis', len(counts.columns))
+    for color, category in zip(colors, counts.columns):
+        plt.stairs(counts[category].to_numpy(), edges, label=category, color=color, linewidth=1.5)
+    plt.title('Product Price Distribution (Log-Normal Mix)', fontweight='bold')
+    plt.xlabel('Price (EUR)')
+    plt.ylabel('Count')
+    plt.legend(title='category')
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    plt.close()
+
+
+def render_pareto(ranks, scores, path):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(ranks, scores, color='#e74c3c', linewidth=2)
+    plt.fill_between(ranks, 0, scores, color='#e74c3c', alpha=0.1)
+    plt.xscale('log')
+    plt.title('Product Affinity (Pareto Distribution)', fontweight='bold')
+    plt.xlabel('Product Rank (log scale)')
+    plt.ylabel('Selection Probability Score')
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    plt.close()
+
+
+def data_tables(data_dir, fmt):
+    """FROM-able typed reads of the raw files (same schemas as load_duckdb)."""
+    from load_duckdb import source_query
+
+    tables = {}
+    for table in ('raw_orders', 'raw_products'):
+        query, path = source_query(table, data_dir, fmt)
+        if query is None:
+            raise FileNotFoundError(f"{path} not found, generate the data first")
+        tables[table] = f"({query})"
+    return tables
+
+
+def plot_data(output_dir, db_path=None, data_dir=None, fmt='csv', workers=None, max_points=MAX_POINTS):
+    """
+    Plots generated data (any volume): aggregates come from the DuckDB
+    warehouse (db_path) or straight from the raw files (data_dir), and the
+    figures are rendered in parallel processes (workers=1 renders in-process).
+    """
+    import duckdb
+
+    print("Aggregating generated data in DuckDB...")
+    if db_path:
+        con = duckdb.connect(db_path, read_only=True)
+        tables = {'raw_orders': 'raw_orders', 'raw_products': 'raw_products'}
+    else:
+        con = duckdb.connect()
+        tables = data_tables(data_dir, fmt)
+    aggregates = load_aggregates(con, tables, max_points)
+    con.close()
+
+    jobs = [
+        (render_daily_orders, aggregates['daily'], os.path.join(output_dir, 'data_daily_orders.png'), max_points),
+        (render_price_hist, *aggregates['price_hist'], os.path.join(output_dir, 'data_price_distribution.png')),
+        (render_pareto, *aggregates['pareto'], os.path.join(output_dir, 'data_pareto_affinity.png')),
+    ]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    print(f"Rendering {len(jobs)} figures with {workers} worker(s)...")
+    if workers == 1:
+        setup_style()
+        for func, *args in jobs:
+            func(*args)
+    else:
+        # Each figure is independent: one process per figure, styled by the initializer
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_style) as pool:
+            for future in [pool.submit(func, *args) for func, *args in jobs]:
+                future.result()
+
+
+def main(output_dir=None, db_path=None, data_dir=None, fmt='csv', workers=None, max_points=MAX_POINTS):
+    output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
     os.makedirs(output_dir, exist_ok=True) # visual artifacts go into viz/
     
-    setup_style()
-    plot_seasonality(output_dir)
-    plot_distributions(output_dir)
+    if db_path or data_dir:
+        # Generated data: aggregated in DuckDB, written as data_*.png next to the documentation plots
+        plot_data(output_dir, db_path=db_path, data_dir=data_dir, fmt=fmt, workers=workers, max_points=max_points)
+    else:
+        setup_style()
+        plot_seasonality(output_dir)
+        plot_distributions(output_dir)
     print(f"Plots saved to {output_dir}")
 
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Render the seasonality and product distribution plots, or plots of the generated data.")
+    parser.add_argument('--output-dir', default=None, help="Where the PNGs go (default: viz/)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--db-path', default=None, help="Plot the raw tables of this DuckDB warehouse")
+    source.add_argument('--data-dir', default=None, help="Plot the raw files generated into this directory")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Format of the files in --data-dir")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes rendering the data plots (default: one per figure, up to the CPU count)")
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS,
+                        help=f"Points per plotted series before downsampling (default: {MAX_POINTS})")
+    args = parser.parse_args(argv)
+    main(output_dir=args.output_dir, db_path=args.db_path, data_dir=args.data_dir, fmt=args.format,
+         workers=args.workers, max_points=args.max_points)
+
 if __name__ == "__main__":
-    main()
+    cli()